@@ -0,0 +1,391 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# qwiic_ccs811_bench.py
+#
+# Benchmarks for the Qwiic CCS811 driver
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+#
+# More information on qwiic is at https://www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+# Benchmark suite
+#
+# Measures the cost per sample of the main driver flows, running against the
+# simulated device in qwiic_ccs811_sim. For each flow it reports:
+#
+#   - I2C transactions per sample
+#   - bytes on the wire per sample (including address bytes)
+#   - estimated bus time per sample at 10 kHz and 100 kHz
+#   - Python CPU time per sample
+#   - memory allocated per sample: the peak bytes in use during a sample above
+#     the bytes in use when it started, and the bytes still held after it,
+#     averaged over the samples (Python 3.9 and later, via tracemalloc)
+#
+# It also measures the time to import the module and construct a sensor in a
+# fresh interpreter. With --check-startup the run fails if these are over budget,
+# or if importing or constructing touches qwiic_i2c or the platform probe.
+#
+# With --check-cadence, iter_samples() is run in drive mode 4 against devices
+# whose clocks run fast and slow, and the run fails if any result is missed.
+#
+# Results are written as JSON, so they can be kept and compared between releases:
+#
+#   python qwiic_ccs811_bench.py --samples 2000 --output results.json
+#
+
+from __future__ import print_function, division
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# Run from a source checkout without installing
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import qwiic_ccs811
+import qwiic_ccs811_sim
+
+_BUS_SPEEDS = (10000, 100000)
+
+_process_time = getattr(time, 'process_time', time.clock if hasattr(time, 'clock') else time.time)
+
+#----------------------------------------------------
+# Driver wrapper that counts what goes over the wire
+class CountingDriver(object):
+    """
+        Wraps an i2c driver and counts transactions and bytes.
+
+        Byte counts include the address byte(s) of each transaction: a write is
+        address, register and data; a read adds a repeated start and a second
+        address byte. Bus time adds one bit per START, repeated START and STOP
+        to the 9 bits (8 + ACK) of each byte.
+    """
+    def __init__(self, driver):
+
+        self._driver = driver
+        self.reset()
+
+    def reset(self):
+        """Clear the counters"""
+        self.transactions = 0
+        self.bytes = 0
+        self.conditions = 0
+
+    def _count(self, nBytes, read):
+
+        self.transactions += 1
+        if read:
+            self.bytes += 3 + nBytes
+            self.conditions += 3
+        else:
+            self.bytes += 2 + nBytes
+            self.conditions += 2
+
+    def bus_time(self, speed):
+        """Estimated seconds on the bus at the given clock speed"""
+        return (self.bytes * 9 + self.conditions) / float(speed)
+
+    def isDeviceConnected(self, devAddress):
+        return self._driver.isDeviceConnected(devAddress)
+
+    def readByte(self, address, commandCode):
+        self._count(1, True)
+        return self._driver.readByte(address, commandCode)
+
+    def readWord(self, address, commandCode):
+        self._count(2, True)
+        return self._driver.readWord(address, commandCode)
+
+    def readBlock(self, address, commandCode, nBytes):
+        self._count(nBytes, True)
+        return self._driver.readBlock(address, commandCode, nBytes)
+
+    def writeCommand(self, address, commandCode):
+        self._count(0, False)
+        return self._driver.writeCommand(address, commandCode)
+
+    def writeByte(self, address, commandCode, value):
+        self._count(1, False)
+        return self._driver.writeByte(address, commandCode, value)
+
+    def writeWord(self, address, commandCode, value):
+        self._count(2, False)
+        return self._driver.writeWord(address, commandCode, value)
+
+    def writeBlock(self, address, commandCode, value):
+        self._count(len(value), False)
+        return self._driver.writeBlock(address, commandCode, value)
+
+#----------------------------------------------------
+# Flows. Each one returns a function that runs one sample (or operation),
+# given a started sensor and the emulator clock.
+
+def _flow_begin(sensor, clock):
+    return sensor.begin
+
+def _flow_begin_warm(sensor, clock):
+    return lambda: sensor.begin(warm=True)
+
+def _flow_poll_read(sensor, clock):
+    # Example 1, with the data_available() check
+    def sample():
+        clock.advance(1.0)
+        if sensor.data_available():
+            sensor.read_algorithm_results()
+    return sample
+
+def _flow_read_frame(sensor, clock):
+    # The same loop, using the single transaction frame read
+    def sample():
+        clock.advance(1.0)
+        sensor.read_frame()
+    return sample
+
+def _flow_ntc_compensation(sensor, clock):
+    # Example 3
+    sensor.referance_resistance = 9950
+    def sample():
+        clock.advance(1.0)
+        if sensor.data_available():
+            sensor.read_algorithm_results()
+            sensor.read_ntc()
+            sensor.set_environmental_data(50, sensor.temperature)
+        elif sensor.check_status_error():
+            sensor.get_error_register()
+    return sample
+
+def _flow_drive_mode(sensor, clock):
+    modes = [1, 2, 3]
+    def sample():
+        mode = modes.pop(0)
+        modes.append(mode)
+        sensor.set_drive_mode(mode)
+    return sample
+
+# name -> (flow, needs begin(), default number of samples)
+FLOWS = (
+    ('begin',               _flow_begin,            False, 20),
+    ('begin_warm',          _flow_begin_warm,       True,  None),
+    ('poll_read',           _flow_poll_read,        True,  None),
+    ('read_frame',          _flow_read_frame,       True,  None),
+    ('ntc_compensation',    _flow_ntc_compensation, True,  None),
+    ('drive_mode',          _flow_drive_mode,       True,  None),
+)
+
+def run_flow(name, flow, needs_begin, samples):
+    """
+        Run one flow against a fresh emulated sensor and return its results.
+    """
+    clock = qwiic_ccs811_sim.VirtualClock()
+    driver = CountingDriver(qwiic_ccs811_sim.Ccs811Emulator(clock=clock))
+    sensor = qwiic_ccs811.QwiicCcs811(i2c_driver=driver)
+
+    if needs_begin:
+        sensor.begin()
+
+    run = flow(sensor, clock)
+    driver.reset()
+
+    cpu = _process_time()
+    for _ in range(samples):
+        run()
+    cpu = _process_time() - cpu
+
+    transactions, nBytes = driver.transactions, driver.bytes
+    busTimes = dict((speed, driver.bus_time(speed)) for speed in _BUS_SPEEDS)
+
+    # second pass for memory, so tracing doesn't skew the CPU time
+    allocated = retained = None
+    if tracemalloc is not None and hasattr(tracemalloc, 'reset_peak'):
+        allocated = 0
+        tracemalloc.start()
+        start = tracemalloc.get_traced_memory()[0]
+        for _ in range(samples):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            run()
+            allocated += tracemalloc.get_traced_memory()[1] - before
+        retained = tracemalloc.get_traced_memory()[0] - start
+        tracemalloc.stop()
+        allocated /= float(samples)
+        retained /= float(samples)
+
+    result = {
+        'samples': samples,
+        'transactions_per_sample': transactions / float(samples),
+        'bytes_per_sample': nBytes / float(samples),
+        'cpu_us_per_sample': cpu * 1e6 / samples,
+        'alloc_bytes_per_sample': allocated,
+        'retained_bytes_per_sample': retained,
+    }
+    for speed in _BUS_SPEEDS:
+        result['bus_ms_per_sample_%dk' % (speed // 1000)] = busTimes[speed] * 1e3 / samples
+
+    return result
+
+#----------------------------------------------------
+# Startup cost, measured in a fresh interpreter
+
+# Budgets for --check-startup
+IMPORT_BUDGET_MS = 50.
+CONSTRUCT_BUDGET_US = 100.
+
+_STARTUP_SCRIPT = '''
+import json, sys, time
+sys.path.insert(0, %r)
+start = time.time()
+import qwiic_ccs811
+imported = time.time()
+for _ in range(100):
+    qwiic_ccs811.QwiicCcs811()
+done = time.time()
+print(json.dumps({
+    'import_ms': (imported - start) * 1e3,
+    'construct_us': (done - imported) * 1e6 / 100,
+    'qwiic_i2c_loaded': 'qwiic_i2c' in sys.modules,
+    'platform_probed': qwiic_ccs811.QwiicCcs811._RPiCheck,
+}))
+'''
+
+def run_startup():
+    """
+        Measure import and construction time in a new interpreter.
+    """
+    source = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    output = subprocess.check_output([sys.executable, '-c', _STARTUP_SCRIPT % source])
+    return json.loads(output.decode('utf-8'))
+
+def check_startup(startup):
+    """
+        Return a list of startup budget violations.
+    """
+    problems = []
+    if startup['import_ms'] > IMPORT_BUDGET_MS:
+        problems.append("import took %.1f ms, budget %.1f ms" % (startup['import_ms'], IMPORT_BUDGET_MS))
+    if startup['construct_us'] > CONSTRUCT_BUDGET_US:
+        problems.append("construction took %.1f us, budget %.1f us" % (startup['construct_us'], CONSTRUCT_BUDGET_US))
+    if startup['qwiic_i2c_loaded']:
+        problems.append("qwiic_i2c was imported before the first bus access")
+    if startup['platform_probed']:
+        problems.append("the Raspberry Pi probe ran before the first bus access")
+    return problems
+
+#----------------------------------------------------
+# iter_samples() cadence tracking, against devices with clock errors. This runs
+# in real time, so the devices are run in parallel.
+
+CADENCE_CLOCK_ERRORS = (-0.10, -0.05, -0.03, 0., 0.03, 0.10)
+CADENCE_SAMPLES = 60
+
+def run_cadence(samples=CADENCE_SAMPLES):
+    """
+        Return, for each device clock error, the results missed by iter_samples()
+        and the transactions and bytes read per sample.
+    """
+    results = {}
+
+    def run(clockError):
+        device = qwiic_ccs811_sim.Ccs811Emulator(clock_error=clockError)
+        sensor = qwiic_ccs811.QwiicCcs811(i2c_driver=device)
+        sensor.begin()
+        sensor.set_drive_mode(4)
+        device.transactions = 0
+        device.bytes_read = 0
+        for _ in sensor.iter_samples(samples):
+            pass
+        results['%+.2f' % clockError] = {'missed': device.missed_results,
+                                         'transactions_per_sample': device.transactions / float(samples),
+                                         'bytes_read_per_sample': device.bytes_read / float(samples)}
+
+    threads = [threading.Thread(target=run, args=(clockError,)) for clockError in CADENCE_CLOCK_ERRORS]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return results
+
+def runBenchmarks():
+
+    parser = argparse.ArgumentParser(description="Benchmark the qwiic CCS811 driver against a simulated device")
+    parser.add_argument('--samples', type=int, default=1000, help="samples per flow")
+    parser.add_argument('--flow', action='append', help="only run this flow (can be repeated)")
+    parser.add_argument('--output', help="write the JSON results to this file")
+    parser.add_argument('--check-startup', action='store_true',
+                        help="fail if import or construction is over budget")
+    parser.add_argument('--check-cadence', action='store_true',
+                        help="fail if iter_samples() misses results from a device with a fast or slow clock")
+    args = parser.parse_args()
+
+    startup = run_startup()
+
+    results = {}
+    for name, flow, needs_begin, samples in FLOWS:
+        if args.flow and name not in args.flow:
+            continue
+        results[name] = run_flow(name, flow, needs_begin, samples or args.samples)
+
+    report = {'python': sys.version.split()[0], 'startup': startup, 'flows': results}
+
+    cadence = None
+    if args.check_cadence:
+        cadence = report['cadence'] = run_cadence()
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+
+    if args.output:
+        with open(args.output, 'w') as fOut:
+            fOut.write(text + '\n')
+    else:
+        print(text)
+
+    if args.check_startup:
+        problems = check_startup(startup)
+        for problem in problems:
+            print("Startup budget: %s" % problem, file=sys.stderr)
+        if problems:
+            sys.exit(1)
+
+    if cadence is not None:
+        missed = [(error, values['missed']) for error, values in sorted(cadence.items()) if values['missed']]
+        for error, count in missed:
+            print("Cadence: missed %d results with clock error %s" % (count, error), file=sys.stderr)
+        if missed:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    runBenchmarks()
@@ -64,7 +64,30 @@ from __future__ import print_function, division
 import time
 import math
 import sys
-import qwiic_i2c
+import os
+import heapq
+import select
+import threading
+from array import array
+from collections import namedtuple, deque
+
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
+# qwiic_i2c is imported when the first driver is needed - see _load_qwiic_i2c()
+qwiic_i2c = None
+
+def _load_qwiic_i2c():
+
+    global qwiic_i2c  # pylint: disable=global-statement
+
+    if qwiic_i2c is None:
+        import qwiic_i2c as module  # pylint: disable=import-outside-toplevel
+        qwiic_i2c = module
+
+    return qwiic_i2c
 
 #======================================================================
 # NOTE: For Raspberry Pi
@@ -186,344 +209,2204 @@ CSS811_HW_VERSION = 0x21
 CSS811_FW_BOOT_VERSION = 0x23
 CSS811_FW_APP_VERSION = 0x24
 CSS811_ERROR_ID = 0xE0
+CSS811_APP_ERASE = 0xF1
+CSS811_APP_DATA = 0xF2
+CSS811_APP_VERIFY = 0xF3
 CSS811_APP_START = 0xF4
 CSS811_SW_RESET = 0xFF
 
-
-class QwiicCcs811(object):
+# STATUS register bits
+_STATUS_ERROR       = 1 << 0
+_STATUS_DATA_READY  = 1 << 3
+_STATUS_APP_VALID   = 1 << 4
+_STATUS_APP_VERIFY  = 1 << 5    # boot mode only
+_STATUS_APP_ERASE   = 1 << 6    # boot mode only
+_STATUS_FW_MODE     = 1 << 7
+
+# MEAS_MODE register fields
+_MEAS_MODE_INT_THRESH   = 1 << 2
+_MEAS_MODE_INT_DATARDY  = 1 << 3
+_MEAS_MODE_DRIVE_SHIFT  = 4
+_MEAS_MODE_DRIVE_MASK   = 0b00000111 << _MEAS_MODE_DRIVE_SHIFT
+
+# Seconds between results for each drive mode. Mode 0 (idle) never produces data
+_DRIVE_MODE_PERIODS = {0: None, 1: 1.0, 2: 10.0, 3: 60.0, 4: 0.25}
+
+# Power on values of the THRESHOLDS register, in ppm
+_DEFAULT_LOW_MED = 1500
+_DEFAULT_MED_HIGH = 2500
+_DEFAULT_HYSTERESIS = 50
+
+# eCO2 bands of the threshold interrupt
+CO2_BAND_LOW = 0
+CO2_BAND_MEDIUM = 1
+CO2_BAND_HIGH = 2
+
+# Size of the full ALG_RESULT_DATA block:
+#   eCO2 (2), TVOC (2), STATUS, ERROR_ID, RAW_DATA (2)
+_ALG_RESULT_FRAME_SIZE = 8
+
+# RAW_DATA ADC reference - 1023 counts == 1.65 V
+_RAW_ADC_VREF = 1.65
+
+# Use a monotonic clock for scheduling when the platform has one
+_monotonic = getattr(time, 'monotonic', time.time)
+
+#----------------------------------------------------
+# A decoded ALG_RESULT_DATA frame, as returned by QwiicCcs811.read_frame()
+class CCS811Frame(namedtuple('CCS811Frame', ['co2', 'tvoc', 'status', 'error_id', 'current', 'raw_adc'])):
     """
-    QwiicCccs811
-
-        :param address: The I2C address to use for the device.
-                        If not provided, the default address is used.
-        :param i2c_driver: An existing i2c driver object. If not provided
-                        a driver object is created.
-        :return: The Ccs811 device object.
-        :rtype: Object
+        A decoded 8 byte ALG_RESULT_DATA frame.
+
+        :co2: eCO2 value in ppm
+        :tvoc: TVOC value in ppb
+        :status: Value of the STATUS register at the time of the read
+        :error_id: Value of the ERROR_ID register at the time of the read
+        :current: Current through the sensor, in uA
+        :raw_adc: Raw 10 bit ADC reading of the sensor voltage
     """
-    # Constructor
-    device_name = _DEFAULT_NAME
-    available_addresses = _AVAILABLE_I2C_ADDRESS
-
-    # The Arduino lib for this sensor defines return/status codes
-    # as an enum in the class. Mimicing this here using class variables
-    SENSOR_SUCCESS          = 0
-    SENSOR_ID_ERROR         = 1
-    SENSOR_I2C_ERROR        = 2
-    SENSOR_INTERNAL_ERROR   = 3
-    SENSOR_GENERIC_ERROR    = 4
-
-    _RPiCheck = False
-
-    def __init__(self, address=None, i2c_driver=None):
-
-
-        # As noted above, to run this device on a Raspberry Pi,
-        # clock streching is needed.
-        #
-        # Lets check if it's enabled. This is done only once in
-        # the session
-        if not QwiicCcs811._RPiCheck:
-            _checkForRPiI2CClockStretch()
-            QwiicCcs811._RPiCheck = True
+    __slots__ = ()
 
+    @property
+    def data_ready(self):
+        """True if the frame holds a new, unread result"""
+        return self.status & _STATUS_DATA_READY != 0
 
+    @property
+    def error(self):
+        """True if the ERROR bit was set in the status register"""
+        return self.status & _STATUS_ERROR != 0
 
-        # Did the user specify an I2C address?
+    @property
+    def voltage(self):
+        """The sensor voltage in volts, decoded from raw_adc"""
+        return raw_adc_to_voltage(self.raw_adc)
 
-        self.address = address if address is not None else self.available_addresses[0]
+def raw_adc_to_voltage(raw_adc):
+    """
+        Convert a RAW_DATA ADC value to volts.
 
-        # load the I2C driver if one isn't provided
+        :param raw_adc: The 10 bit ADC value
+        :return: The voltage across the sensor
+        :rtype: float
+    """
+    return raw_adc * _RAW_ADC_VREF / 1023.
 
-        if i2c_driver is None:
-            self._i2c = qwiic_i2c.getI2CDriver()
-            if self._i2c is None:
-                print("Unable to load I2C driver for this platform.")
-                return
-        else:
-            self._i2c = i2c_driver
+#----------------------------------------------------
+# A batch of RAW_DATA samples, from QwiicCcs811.iter_raw_batches(). Each
+# field is a typed array: timestamp ('d'), current in uA ('B') and raw_adc ('H')
+class CCS811RawBatch(namedtuple('CCS811RawBatch', ['timestamp', 'current', 'raw_adc'])):
+    """
+        A batch of raw samples, stored in typed arrays.
 
-        # qir quality values returned from the sensor
-        self.refResistance = 10000.
-        self._resistance = 0.0
-        self._TVOC = 0
-        self._CO2 = 0
-        self.vrefCounts = 0
-        self.ntcCounts = 0
-        self._temperature =  0.0
+        :timestamp: Monotonic time each sample was read, array('d')
+        :current: Current through the sensor in uA, array('B')
+        :raw_adc: Raw 10 bit ADC value of the sensor voltage, array('H')
+    """
+    __slots__ = ()
 
-    # ----------------------------------
-    # is_connected()
-    #
-    # Is an actual board connected to our system?
+    def __len__(self):
+        return len(self.timestamp)
 
-    def is_connected(self):
+    def voltages(self):
         """
-            Determine if a CCS811 device is conntected to the system..
-
-            :return: True if the device is connected, otherwise False.
-            :rtype: bool
+            Return the sensor voltages of the batch, in volts.
 
+            :rtype: array
         """
-        return qwiic_i2c.isDeviceConnected(self.address)
+        return array('f', (raw_adc_to_voltage(value) for value in self.raw_adc))
 
-    connected = property(is_connected)
-    # ----------------------------------
-    # begin()
-    #
-    # Initialize the system/validate the board.
-    def begin(self):
+    def append(self, timestamp, frame):
         """
-            Initialize the operation of the Ccs811 module
-
-            :return: Returns SENSOR_SUCCESS on success, SENSOR_ID_ERROR on bad chip ID
-                or SENSOR_INTERNAL_ERROR.
-            :rtype: integer
+            Add the raw sample of a result frame to the batch.
 
+            :param timestamp: Monotonic time the frame was read
+            :param frame: The CCS811Frame
+            :return: No return value
         """
+        self.timestamp.append(timestamp)
+        self.current.append(frame.current)
+        self.raw_adc.append(frame.raw_adc)
 
-        # wait for sensor to come up...
-        time.sleep(.1)
+def _new_raw_batch():
 
-        # found it's best to reset the device the try to check chipid.
-        # If the chip is in a bad state, the ID returns 0xFF and needs
-        # a kick.
+    return CCS811RawBatch(array('d'), array('B'), array('H'))
 
-        data = [0x11, 0xE5, 0x72, 0x8A] # Reset key
+#----------------------------------------------------
+# Identity and configuration of a sensor, as returned by QwiicCcs811.device_info()
+class CCS811DeviceInfo(namedtuple('CCS811DeviceInfo', ['address', 'hw_id', 'hw_version', 'fw_boot_version',
+                                                       'fw_app_version', 'meas_mode', 'drive_mode', 'baseline'])):
+    """
+        Identity and configuration registers of a sensor.
+
+        :address: I2C address of the sensor
+        :hw_id: Value of HW_ID, 0x81 for a CCS811
+        :hw_version: Value of HW_VERSION
+        :fw_boot_version: Boot loader version, as 'major.minor.trivial'
+        :fw_app_version: Application firmware version, as 'major.minor.trivial'
+        :meas_mode: Value of MEAS_MODE
+        :drive_mode: The drive mode field of MEAS_MODE
+        :baseline: Value of BASELINE
+    """
+    __slots__ = ()
 
-        self._i2c.writeBlock(self.address, CSS811_SW_RESET, data)
+# Firmware versions are major.minor in the first byte, trivial in the second
+def _format_version(data):
+    return '%d.%d.%d' % (data[0] >> 4, data[0] & 0x0F, data[1])
 
-        time.sleep(.5)
+#----------------------------------------------------
+def co2_band(co2, low_med=_DEFAULT_LOW_MED, med_high=_DEFAULT_MED_HIGH, hysteresis=0, previous=None):
+    """
+        Return the eCO2 band of a value, as used by the threshold interrupt.
 
-        # are we who we need to be?
-        chipID = self._i2c.readByte(self.address, CSS811_HW_ID)
-        if chipID not in _validChipIDs:
-            print("Invalid Chip ID: 0x%.2X" % chipID)
-            return self.SENSOR_ID_ERROR
+        :param co2: The eCO2 value, in ppm
+        :param low_med: The low to medium threshold
+        :param med_high: The medium to high threshold
+        :param hysteresis: A change from the previous band only counts if the
+                        value is past the threshold by more than this
+        :param previous: The previous band, or None
 
-        if self.check_status_error() or not self.app_valid():
-            return self.SENSOR_INTERNAL_ERROR
+        :return: CO2_BAND_LOW, CO2_BAND_MEDIUM or CO2_BAND_HIGH
+        :rtype: integer
+    """
+    if co2 < low_med:
+        band = CO2_BAND_LOW
+    elif co2 <= med_high:
+        band = CO2_BAND_MEDIUM
+    else:
+        band = CO2_BAND_HIGH
+
+    if previous is None or band == previous:
+        return band
+
+    # the threshold crossed, nearest the value
+    threshold = low_med if min(band, previous) == CO2_BAND_LOW else med_high
+    if abs(co2 - threshold) > hysteresis:
+        return band
+
+    return previous
+
+# RAW_DATA: current in the upper 6 bits, 10 bit ADC value in the rest
+def _decode_raw(msb, lsb):
+    return msb >> 2, ((msb & 0x03) << 8) | lsb
+
+def _decode_frame(data):
+    # Data ordered:
+    #   co2MSB, co2LSB, tvocMSB, tvocLSB, status, errorID, rawMSB, rawLSB
+    current, rawADC = _decode_raw(data[6], data[7])
+    return CCS811Frame((data[0] << 8) | data[1],
+                       (data[2] << 8) | data[3],
+                       data[4],
+                       data[5],
+                       current,
+                       rawADC)
 
-        self._i2c.writeCommand(self.address, CSS811_APP_START)
 
-        return self.set_drive_mode(1)  # read every second
+#======================================================================
+# NTC conversion
+#
+# The NTC register holds the voltage across the reference resistor and across
+# the thermistor, in ADC counts. These convert the counts to the thermistor
+# resistance and then, with the Steinhart-Hart equation, to a temperature.
+#
+# Code from Milan Malesevic and Zoran Stupic, 2011,
+# Modified by Max Mayfield,
+#======================================================================
 
-    #****************************************************************************#
-    #
-    #   Sensor functions
-    #
-    # ****************************************************************************#
-    # Updates the total voltatile organic compounds (TVOC) in parts per billion (PPB)
-    # and the CO2 value
-    # Returns nothing
-    def read_algorithm_results(self):
-        """
-            Reads the resutls from the sensor and stores internally
+# Steinhart-Hart coefficients
+_SH_A = 0.001129148
+_SH_B = 0.000234125
+_SH_C = 0.0000000876741
 
-            :return: SENSOR_SUCCESS
-            :rtype: integer
+def ntc_resistance(vrefCounts, ntcCounts, refResistance):
+    """
+        Convert NTC register counts to the thermistor resistance.
 
-        """
+        :param vrefCounts: Counts across the reference resistor
+        :param ntcCounts: Counts across the thermistor
+        :param refResistance: The reference resistance, in ohms
 
-        data = self._i2c.readBlock(self.address, CSS811_ALG_RESULT_DATA, 4)
+        :return: The resistance in ohms, NaN if vrefCounts is 0
+        :rtype: float
+    """
+    if vrefCounts == 0:
+        return float('nan')
 
-        #  Data ordered:
-        #  co2MSB, co2LSB, tvocMSB, tvocLSB
+    return ntcCounts * refResistance / float(vrefCounts)
 
-        self._CO2 = (data[0] << 8) | data[1]
-        self._TVOC = (data[2] << 8) | data[3]
-        return self.SENSOR_SUCCESS
+def ntc_temperature(resistance):
+    """
+        Convert a thermistor resistance to a temperature.
 
-    #----------------------------------------------------
-    # Checks to see if error bit is set
-    def check_status_error(self):
-        """
-            Returns  if the Error bit on the sensor is set.
+        :param resistance: The resistance in ohms
 
-            :return: value of Error bit
-            :rtype: integer
+        :return: The temperature in degrees C, NaN if the resistance is invalid
+        :rtype: float
+    """
+    # Log 0 is not a happy value
+    if not resistance >= 1:
+        return float('nan')
 
-        """
-        # return the status bit
-        value = self._i2c.readByte(self.address, CSS811_STATUS)
+    logR = math.log(int(resistance))
+    return 1 / (_SH_A + (_SH_B * logR) + (_SH_C * logR * logR * logR)) - 273.15  # Kelvin to Celsius
 
-        return value & 1 << 0
+def ntc_convert_batch(vrefCounts, ntcCounts, refResistance):
+    """
+        Convert arrays of NTC register counts to resistances and temperatures.
+        This needs NumPy.
 
-    #----------------------------------------------------
-    # Checks to see if DATA_READ flag is set in the status register
-    def data_available(self):
-        """
-            Returns True if data is available on the sensor
+        :param vrefCounts: Array of counts across the reference resistor
+        :param ntcCounts: Array of counts across the thermistor
+        :param refResistance: The reference resistance in ohms, a scalar or an array
 
-            :return: True if data is available.
-            :rtype: bool
+        :return: (resistances, temperatures) as float64 arrays. Invalid entries are NaN.
+                Scalar counts give 0-d arrays.
+        :rtype: tuple
+    """
+    import numpy  # pylint: disable=import-outside-toplevel
 
-        """
+    vref = numpy.asarray(vrefCounts, dtype=numpy.float64)
+    ntc = numpy.asarray(ntcCounts, dtype=numpy.float64)
 
-        try:
-            value = self._i2c.readByte(self.address, CSS811_STATUS)
-        except IOError:
-            value = 0  # This will return 0
+    # numpy.where rather than masked assignment, so scalar inputs work too
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        resistance = numpy.where(vref == 0, numpy.nan, ntc * refResistance / vref)
 
-        return value & 1 << 3 != 0
+        logR = numpy.log(numpy.trunc(resistance))
+        temperature = 1 / (_SH_A + (_SH_B * logR) + (_SH_C * logR * logR * logR)) - 273.15
+        temperature = numpy.where(resistance >= 1, temperature, numpy.nan)
 
-    #----------------------------------------------------
-    # Checks to see if APP_VALID flag is set in the status register
-    def app_valid(self):
-        """
-            Returns True if if the sensor APP_VALID bit is set in the status register
+    return resistance, temperature
 
-            :return: True if APP_VALID is set
-            :rtype: bool
+class NtcTemperatureTable(object):
+    """
+    NtcTemperatureTable
 
-        """
+        Precomputed temperatures for each whole ohm of resistance in a range.
+        The conversion uses whole ohms, so looking a value up gives the same
+        result as ntc_temperature(). Resistances outside the range are computed.
 
-        try:
-            value = self._i2c.readByte(self.address, CSS811_STATUS)
-        except IOError:
-            value = 0  # This will return 0
+        The default range covers a 10K NTC over the -25 to 50 C range of the
+        sensor and takes about 1 MB.
 
-        return value & 1 << 4 != 0
+        :param min_resistance: Lowest resistance in the table, in ohms
+        :param max_resistance: Highest resistance in the table, in ohms
+        :return: The table object.
+        :rtype: Object
+    """
+    def __init__(self, min_resistance=3000, max_resistance=135000):
 
-    def get_error_register(self):
+        self.min_resistance = int(min_resistance)
+        self.max_resistance = int(max_resistance)
+        self._table = array('d', (ntc_temperature(r) for r in range(self.min_resistance, self.max_resistance + 1)))
 
+    def temperature(self, resistance):
         """
-            Returns the value of the sensors error Register
-
-            :return: Error register
-            :rtype: int
+            Return the temperature for a resistance.
 
+            :param resistance: The resistance in ohms
+            :return: The temperature in degrees C, NaN if the resistance is invalid
+            :rtype: float
         """
-        try:
-            value = self._i2c.readByte(self.address, CSS811_ERROR_ID)
-        except IOError:
-            value = 0xFF
-
-        return value  # Send all errors in the event of communication error
+        if self.min_resistance <= resistance < self.max_resistance + 1:
+            return self._table[int(resistance) - self.min_resistance]
 
-    error_register = property(get_error_register)
+        return ntc_temperature(resistance)
 
-    # Returns the baseline value
-    # Used for telling sensor what 'clean' air is
-    # You must put the sensor in clean air and record this value
-    def get_baseline(self):
-        """
-            Returns the baseline value
-            Used for telling sensor what 'clean' air is
-            You must put the sensor in clean air and record this value
 
-            :return: Baseline value for the sensor
-            :rtype: integer
+#======================================================================
+# I2C instrumentation
+#
+# An optional wrapper around the i2c driver that keeps per register counts
+# and latency histograms. See QwiicCcs811.enable_stats()
+#======================================================================
 
-        """
-        try:
-            value = self._i2c.readWord(self.address, CSS811_BASELINE)
-        except IOError:
-            value = 0
+# Register address -> name, for reporting
+_REGISTER_NAMES = dict((value, name) for name, value in globals().items()
+                       if name.startswith('CSS811_'))
 
-        return value
+# Upper bounds of the latency histogram buckets, in microseconds. The last
+# bucket counts everything slower.
+LATENCY_BUCKETS_US = (50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
 
-    #----------------------------------------------------
-    def set_baseline(self, input_val):
-        """
-            Set the baseline value for the sensor
+class _RegisterStats(object):
 
-            :return: SENSOR_SUCCESS
-            :rtype: integer
-        """
+    __slots__ = ('transactions', 'bytes_read', 'bytes_written', 'errors', 'histogram', 'total_time')
 
-        data = bytearray(2)
-        data[0] = (input_val >> 8) & 0x00FF
-        data[1] = input_val & 0x00FF
+    def __init__(self):
 
-        self._i2c.writeWord(self.address, CSS811_BASELINE, input_val)
+        self.transactions = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.errors = 0
+        self.total_time = 0.
+        self.histogram = [0] * (len(LATENCY_BUCKETS_US) + 1)
 
-        return self.SENSOR_SUCCESS
+    def as_dict(self):
 
-    baseline = property(get_baseline, set_baseline)
-    #----------------------------------------------------
-    # Enable the nINT signal
-    def enable_interrupts(self):
-        """
-            Set the Interrupt bit in the sensor and enable Interrupts
-            on the sensor
+        return {'transactions': self.transactions,
+                'bytes_read': self.bytes_read,
+                'bytes_written': self.bytes_written,
+                'errors': self.errors,
+                'total_time': self.total_time,
+                'latency_histogram': list(self.histogram)}
 
-            :return: SENSOR_SUCCESS
-            :rtype: integer
+# Base of the optional layers between the sensor and the i2c driver. Every
+# driver method goes through _call(func, register, nRead, nWritten, args).
+class _DriverWrapper(object):
 
-        """
-        value = self._i2c.readByte(self.address, CSS811_MEAS_MODE)
-        value |= (1 << 3) #Set INTERRUPT bit
+    def __init__(self, driver=None):
 
-        self._i2c.writeByte(self.address, CSS811_MEAS_MODE, value)
+        self.driver = driver
 
-        return self.SENSOR_SUCCESS
+    def _call(self, func, register, nRead, nWritten, args):
+        return func(*args)
 
-    #----------------------------------------------------
-    # Disable the nINT signal
-    def disable_interrupts(self):
-        """
-            Clear the Interrupt bit in the sensor and disable Interrupts
-            on the sensor
+    def isDeviceConnected(self, devAddress):
+        return self.driver.isDeviceConnected(devAddress)
 
-            :return: SENSOR_SUCCESS
-            :rtype: integer
+    def readByte(self, address, commandCode):
+        return self._call(self.driver.readByte, commandCode, 1, 0, (address, commandCode))
 
-        """
-        value = self._i2c.readByte(self.address, CSS811_MEAS_MODE)
-        value &= (~(1 << 3) ) & 0xFF  #Set INTERRUPT bit. Just want first Byte
+    def readWord(self, address, commandCode):
+        return self._call(self.driver.readWord, commandCode, 2, 0, (address, commandCode))
 
-        self._i2c.writeByte(self.address, CSS811_MEAS_MODE, value)
+    def readBlock(self, address, commandCode, nBytes):
+        return self._call(self.driver.readBlock, commandCode, nBytes, 0, (address, commandCode, nBytes))
 
-        return self.SENSOR_SUCCESS
+    def writeCommand(self, address, commandCode):
+        return self._call(self.driver.writeCommand, commandCode, 0, 0, (address, commandCode))
 
-    #----------------------------------------------------
-    # Mode 0 = Idle
-    # Mode 1 = read every 1s
-    # Mode 2 = every 10s
-    # Mode 3 = every 60s
-    # Mode 4 = RAW mode
-    def set_drive_mode(self,  mode):
-        """
-            Set the Drive mode for the sensor
+    def writeByte(self, address, commandCode, value):
+        return self._call(self.driver.writeByte, commandCode, 0, 1, (address, commandCode, value))
 
-            :param mode: Valid values are:
-                    0 = Idle, 1 = read every 1s, 2 = every 10s, 3 = every 60s, 4 = RAW mode
+    def writeWord(self, address, commandCode, value):
+        return self._call(self.driver.writeWord, commandCode, 0, 2, (address, commandCode, value))
 
-            :return: SENSOR_SUCCESS
-            :rtype: integer
+    def writeBlock(self, address, commandCode, value):
+        return self._call(self.driver.writeBlock, commandCode, 0, len(value), (address, commandCode, value))
 
-        """
+# Innermost layer, always present: an I/O error may mean the device was reset
+# (a brownout, say), so the host copies of its registers can't be trusted.
+class _ShadowDriver(_DriverWrapper):
 
-        if mode > 4:
-            mode = 4 # sanitize input
+    def __init__(self, sensor, driver=None):
 
-        value = self._i2c.readByte(self.address, CSS811_MEAS_MODE)
+        _DriverWrapper.__init__(self, driver)
+        self.sensor = sensor
 
-        value &= (~(0b00000111 << 4)) & 0xFF  # Clear DRIVE_MODE bits. Just 1st byte
-        value |= (mode << 4)  #Mask in mode
+    def _call(self, func, register, nRead, nWritten, args):
 
-        self._i2c.writeByte(self.address, CSS811_MEAS_MODE, value)
+        try:
+            return func(*args)
+        except IOError:
+            self.sensor._drop_shadows()
+            raise
 
-        return self.SENSOR_SUCCESS
+class _InstrumentedDriver(_DriverWrapper):
 
-    #----------------------------------------------------
-    ## Given a temp and humidity, write this data to the CSS811 for better compensation
-    ## This function expects the humidity and temp to come in as floats
-    def set_environmental_data(self, relativeHumidity, temperature):
-        """
-            Given a temp and humidity, write this data to the CSS811 for better compensation
-            This function expects the humidity and temp to come in as floats
+    def __init__(self, driver=None):
 
-            :param relativeHumidity: The relativity Humity for the sensor to use
-            :param temperature: The temperature for the sensor to use
+        _DriverWrapper.__init__(self, driver)
+        self.registers = {}
 
-            :return: one of the SENSOR_ return codes.
-            :rtype: integer
+    def _call(self, func, register, nRead, nWritten, args):
 
-        """
+        stats = self.registers.get(register)
+        if stats is None:
+            stats = self.registers[register] = _RegisterStats()
 
-        # Check for invalid temperatures
+        start = _monotonic()
+        try:
+            result = func(*args)
+        except IOError:
+            stats.errors += 1
+            raise
+        finally:
+            elapsed = _monotonic() - start
+            stats.transactions += 1
+            stats.total_time += elapsed
+            usec = elapsed * 1e6
+            bucket = 0
+            for bound in LATENCY_BUCKETS_US:
+                if usec <= bound:
+                    break
+                bucket += 1
+            stats.histogram[bucket] += 1
+
+        stats.bytes_read += nRead
+        stats.bytes_written += nWritten
+        return result
+
+
+#======================================================================
+# Error policy
+#
+# Retries failed transactions with backoff, and stops talking to a sensor
+# that keeps failing (a circuit breaker). After reset_timeout, one probe
+# transaction is let through (half open); if it works, normal operation
+# resumes, otherwise the circuit opens again.
+#======================================================================
+
+CIRCUIT_CLOSED      = 'closed'
+CIRCUIT_OPEN        = 'open'
+CIRCUIT_HALF_OPEN   = 'half_open'
+
+class CircuitOpenError(IOError):
+    """
+        Raised instead of an I2C transaction while the error policy has
+        stopped talking to a failing sensor.
+    """
+    pass
+
+class ErrorPolicy(object):
+    """
+    ErrorPolicy
+
+        Settings for retrying failed I2C transactions and for the circuit
+        breaker. See QwiicCcs811.set_error_policy()
+
+        :param retries: Times a failed transaction is retried
+        :param backoff: Seconds to wait before the first retry
+        :param backoff_factor: Each further retry waits this much longer
+        :param max_backoff: Longest wait between retries, in seconds
+        :param failure_threshold: Consecutive failed transactions (after retries)
+                        that open the circuit
+        :param reset_timeout: Seconds the circuit stays open before a probe
+        :return: The policy object.
+        :rtype: Object
+    """
+    def __init__(self, retries=2, backoff=.01, backoff_factor=2., max_backoff=.5,
+                 failure_threshold=5, reset_timeout=30.):
+
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+class _GuardedDriver(_DriverWrapper):
+
+    def __init__(self, policy, driver=None):
+
+        _DriverWrapper.__init__(self, driver)
+        self.policy = policy
+        self.reset()
+
+    def reset(self):
+
+        self.state = CIRCUIT_CLOSED
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.retried = 0
+        self.rejected = 0
+        self.opened_at = None
+
+    def _call(self, func, register, nRead, nWritten, args):
+
+        policy = self.policy
+
+        if self.state == CIRCUIT_OPEN:
+            if _monotonic() - self.opened_at < policy.reset_timeout:
+                self.rejected += 1
+                raise CircuitOpenError("Circuit open for register 0x%.2X after %d failures" %
+                                       (register, self.consecutive_failures))
+            self.state = CIRCUIT_HALF_OPEN
+
+        # a probe gets one try
+        attempts = 1 if self.state == CIRCUIT_HALF_OPEN else policy.retries + 1
+        delay = policy.backoff
+
+        for attempt in range(attempts):
+            try:
+                result = func(*args)
+            except IOError:
+                if attempt + 1 < attempts:
+                    self.retried += 1
+                    time.sleep(delay)
+                    delay = min(delay * policy.backoff_factor, policy.max_backoff)
+                    continue
+
+                self.consecutive_failures += 1
+                self.total_failures += 1
+                if self.state == CIRCUIT_HALF_OPEN or self.consecutive_failures >= policy.failure_threshold:
+                    self.state = CIRCUIT_OPEN
+                    self.opened_at = _monotonic()
+                raise
+
+            self.consecutive_failures = 0
+            self.state = CIRCUIT_CLOSED
+            return result
+
+
+#----------------------------------------------------
+# nINT edge sources, used by QwiicCcs811.wait_for_data()
+#
+# An edge source has one method, wait(timeout), that blocks until the
+# nINT pin of the sensor is asserted or the timeout (seconds, None for
+# forever) expires. It returns True if an edge was seen.
+
+# Size of the event records read from a GPIO character device line event fd,
+# for FdEdgeSource: struct gpioevent_data (v1 ABI) and gpio_v2_line_event.
+GPIO_V1_EVENT_SIZE  = 16
+GPIO_V2_EVENT_SIZE  = 48
+
+class FdEdgeSource(object):
+    """
+        nINT edge source backed by a file descriptor that becomes readable on an
+        edge - for example the event fd of a GPIO character device line request.
+        The fd stays readable until its events are read, so each wait() reads
+        all pending events.
+
+        :param fd: The file descriptor, or an object with a fileno() method
+        :param event_size: Number of bytes of one event, for example
+                        GPIO_V2_EVENT_SIZE.
+    """
+    def __init__(self, fd, event_size):
+
+        if event_size <= 0:
+            raise ValueError("event_size must be the size of one event on the fd")
+
+        self._fd = fd if isinstance(fd, int) else fd.fileno()
+        self._eventSize = event_size
+
+    def wait(self, timeout=None):
+        """
+            Wait for an edge on the file descriptor.
+
+            :param timeout: Seconds to wait, None to wait forever
+            :return: True if an edge was seen
+            :rtype: bool
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return False
+
+        # drain every pending event, or the fd stays readable
+        while ready:
+            os.read(self._fd, self._eventSize)
+            ready, _, _ = select.select([self._fd], [], [], 0)
+        return True
+
+class CallableEdgeSource(object):
+    """
+        nINT edge source that calls a function to wait for an edge.
+
+        :param func: Called as func(timeout), returns True if an edge was seen
+    """
+    def __init__(self, func):
+
+        self._func = func
+
+    def wait(self, timeout=None):
+        """
+            Wait for an edge by calling the wrapped function.
+
+            :param timeout: Seconds to wait, None to wait forever
+            :return: True if an edge was seen
+            :rtype: bool
+        """
+        return bool(self._func(timeout))
+
+def _make_edge_source(source):
+
+    if source is None or hasattr(source, 'wait'):
+        return source
+    if isinstance(source, int) or hasattr(source, 'fileno'):
+        # the event size can't be guessed, and without draining the fd wait()
+        # would return at once forever
+        raise TypeError("Wrap file descriptors in FdEdgeSource(fd, event_size)")
+    if callable(source):
+        return CallableEdgeSource(source)
+
+    raise TypeError("Unsupported interrupt source: %r" % (source,))
+
+#======================================================================
+# Result cadence
+#
+# The sensor produces results on its own clock, so readers keep an estimate
+# of when the next result will arrive and of the actual period. When a read
+# has to poll for a result, its arrival time is known to within one poll step
+# - this anchors the estimate and measures the period. When data is already
+# waiting, the arrival time is unknown; every few results the read is pulled
+# forward so that it polls and measures the arrival time again, so the
+# estimate never drifts behind a sensor whose clock runs fast.
+#======================================================================
+class _SampleCadence(object):
+
+    GUARD = 0.02        # Read this fraction of a period after the expected result
+    MIN_GUARD = 0.005   # but no less than this number of seconds
+    LEARN_RATE = 0.25   # weight of each new period measurement
+    RECHECK = 3         # reads that find data waiting before the arrival time is measured again
+    MAX_WAIT = 2.0      # periods to poll for a result before giving up
+
+    def __init__(self, period, offset=0.):
+
+        self.nominal = self.period = period
+        self.offset = offset    # read this many seconds after the result, for staggering
+        self.expected = None    # estimated arrival time of the next result
+        self._anchor = None     # last measured arrival time of a result
+        self._early = 0.        # how far the read was last pulled forward
+        self._waiting = 0       # reads in a row that found data waiting
+
+    def get_step(self):
+
+        return max(self.period * self.GUARD, self.MIN_GUARD)
+
+    step = property(get_step)
+
+    def get_max_polls(self):
+
+        return int(self.MAX_WAIT * self.period / self.get_step()) + 1
+
+    max_polls = property(get_max_polls)
+
+    def next_read(self):
+
+        # None means the arrival time isn't known yet - read (and poll) now
+        if self.expected is None:
+            return None
+        if self._early:
+            return self.expected + self.get_step()
+        return self.expected + self.get_step() + self.offset
+
+    def found(self, now, polls):
+
+        # A result was read at time now, after polling the given number of times
+        step = self.get_step()
+
+        if polls:
+            # The result arrived during the last poll step
+            arrival = now - step / 2.
+            if self._anchor is not None:
+                cycles = int(round((arrival - self._anchor) / self.period))
+                if cycles >= 1:
+                    measured = (arrival - self._anchor) / cycles
+                    if abs(measured - self.nominal) < self.nominal * 0.2:
+                        self.period += self.LEARN_RATE * (measured - self.period)
+            self._anchor = arrival
+            self.expected = arrival + self.period
+            self._early = 0.
+            self._waiting = 0
+
+        elif self.expected is not None:
+            self._waiting += 1
+            if self._waiting >= self.RECHECK:
+                # Read early enough that the next read has to poll, doubling the
+                # margin each time the data is still found waiting
+                self._early = min(max(self._early * 2., step * 2.), self.period / 2.)
+                self.expected += self.period - self._early
+            else:
+                self.expected += self.period
+
+    def lost(self):
+
+        # No result came - start again from an unknown arrival time
+        self.expected = None
+        self._early = 0.
+        self._waiting = 0
+
+#======================================================================
+# Sample history
+#
+# A bounded ring buffer of results, stored in typed arrays, with rolling
+# statistics that are updated as each sample is added.
+#======================================================================
+
+# Result of SampleHistory.stats()
+RollingStats = namedtuple('RollingStats', ['count', 'mean', 'min', 'max', 'std'])
+
+class _RollingWindow(object):
+
+    # Mean and variance use a sliding version of Welford's method. Min and max
+    # use monotonic deques of (sequence, value), so each update is amortized O(1).
+    def __init__(self, size):
+
+        self.size = size
+        self.values = deque()
+        self.mean = 0.
+        self.m2 = 0.
+        self._min = deque()
+        self._max = deque()
+        self._seq = 0
+
+    def add(self, value):
+
+        self._seq += 1
+        self.values.append(value)
+
+        if len(self.values) > self.size:
+            old = self.values.popleft()
+            mean = self.mean + (value - old) / float(self.size)
+            self.m2 += (value - old) * (value - mean + old - self.mean)
+            self.mean = mean
+        else:
+            delta = value - self.mean
+            self.mean += delta / float(len(self.values))
+            self.m2 += delta * (value - self.mean)
+
+        first = self._seq - self.size
+
+        queue = self._min
+        while queue and queue[-1][1] >= value:
+            queue.pop()
+        queue.append((self._seq, value))
+        if queue[0][0] <= first:
+            queue.popleft()
+
+        queue = self._max
+        while queue and queue[-1][1] <= value:
+            queue.pop()
+        queue.append((self._seq, value))
+        if queue[0][0] <= first:
+            queue.popleft()
+
+    def stats(self):
+
+        count = len(self.values)
+        if not count:
+            return RollingStats(0, float('nan'), None, None, float('nan'))
+
+        return RollingStats(count, self.mean, self._min[0][1], self._max[0][1],
+                            math.sqrt(max(self.m2, 0.) / count))
+
+class SampleHistory(object):
+    """
+    SampleHistory
+
+        A fixed size history of sensor results. Each column is kept in a typed
+        array, so a sample costs a few bytes instead of a Python object.
+
+        Rolling mean, min, max and (population) standard deviation of CO2 and TVOC
+        are kept up to date for each of the given window sizes.
+
+        :param capacity: The maximum number of samples kept.
+        :param windows: Window sizes, in samples, to keep rolling statistics for.
+                        Each must be no larger than capacity.
+        :return: The history object.
+        :rtype: Object
+    """
+
+    # column name -> array typecode
+    COLUMNS = (('timestamp', 'd'), ('co2', 'H'), ('tvoc', 'H'), ('status', 'B'), ('temperature', 'f'))
+
+    _STAT_FIELDS = ('co2', 'tvoc')
+
+    def __init__(self, capacity=3600, windows=(60,)):
+
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+
+        for size in windows:
+            if size < 1 or size > capacity:
+                raise ValueError("Invalid window size: %r" % (size,))
+
+        self._capacity = capacity
+        self._columns = dict((name, array(code, [0]) * capacity) for name, code in self.COLUMNS)
+        self._next = 0
+        self._count = 0
+        self._windows = dict((field, dict((size, _RollingWindow(size)) for size in windows))
+                             for field in self._STAT_FIELDS)
+
+    def __len__(self):
+        return self._count
+
+    def get_capacity(self):
+        """
+            Return the maximum number of samples kept.
+
+            :rtype: integer
+
+        """
+        return self._capacity
+
+    capacity = property(get_capacity)
+
+    def get_windows(self):
+        """
+            Return the window sizes rolling statistics are kept for.
+
+            :rtype: list
+
+        """
+        return sorted(self._windows[self._STAT_FIELDS[0]])
+
+    windows = property(get_windows)
+
+    def append(self, timestamp, co2, tvoc, status=0, temperature=float('nan')):
+        """
+            Add a sample, replacing the oldest one if the history is full.
+
+            :param timestamp: Time of the sample, in seconds
+            :param co2: The CO2 value
+            :param tvoc: The TVOC value
+            :param status: The value of the status register
+            :param temperature: The NTC temperature, NaN if not known
+
+            :return: No return value
+
+        """
+        index = self._next
+        columns = self._columns
+        columns['timestamp'][index] = timestamp
+        columns['co2'][index] = co2
+        columns['tvoc'][index] = tvoc
+        columns['status'][index] = status
+        columns['temperature'][index] = temperature
+
+        self._next = (index + 1) % self._capacity
+        if self._count < self._capacity:
+            self._count += 1
+
+        for window in self._windows['co2'].values():
+            window.add(co2)
+        for window in self._windows['tvoc'].values():
+            window.add(tvoc)
+
+    def set_last_temperature(self, temperature):
+        """
+            Set the temperature of the newest sample.
+
+            :param temperature: The NTC temperature
+            :return: No return value
+
+        """
+        if self._count:
+            self._columns['temperature'][(self._next - 1) % self._capacity] = temperature
+
+    def stats(self, field='co2', window=None):
+        """
+            Return rolling statistics of a field.
+
+            :param field: 'co2' or 'tvoc'
+            :param window: The window size. If not provided, the smallest window is used.
+
+            :return: The statistics of the window
+            :rtype: RollingStats
+
+        """
+        windows = self._windows[field]
+        if window is None:
+            window = min(windows)
+
+        return windows[window].stats()
+
+    def column_views(self, name):
+        """
+            Return zero-copy views of a column, oldest sample first.
+
+            The ring buffer may wrap, so the column is returned as two memoryviews.
+            The second one is empty until the history has filled up.
+
+            :param name: The column name, see COLUMNS
+            :return: The (older, newer) views
+            :rtype: tuple
+
+        """
+        view = memoryview(self._columns[name])
+        if self._count < self._capacity:
+            return view[:self._count], view[0:0]
+
+        return view[self._next:], view[:self._next]
+
+    def column(self, name):
+        """
+            Return a copy of a column, oldest sample first.
+
+            :param name: The column name, see COLUMNS
+            :return: The column values
+            :rtype: array
+
+        """
+        older, newer = self.column_views(name)
+        result = array(self._columns[name].typecode, older.tobytes())
+        result.extend(array(result.typecode, newer.tobytes()))
+        return result
+
+    def clear(self):
+        """
+            Remove all samples and reset the statistics.
+
+            :return: No return value
+
+        """
+        self._next = 0
+        self._count = 0
+        for windows in self._windows.values():
+            for size in list(windows):
+                windows[size] = _RollingWindow(size)
+
+
+class QwiicCcs811(object):
+    """
+    QwiicCccs811
+
+        :param address: The I2C address to use for the device.
+                        If not provided, the default address is used.
+        :param i2c_driver: An existing i2c driver object. If not provided
+                        a driver object is created.
+        :return: The Ccs811 device object.
+        :rtype: Object
+    """
+    # Constructor
+    device_name = _DEFAULT_NAME
+    available_addresses = _AVAILABLE_I2C_ADDRESS
+
+    # The Arduino lib for this sensor defines return/status codes
+    # as an enum in the class. Mimicing this here using class variables
+    SENSOR_SUCCESS          = 0
+    SENSOR_ID_ERROR         = 1
+    SENSOR_I2C_ERROR        = 2
+    SENSOR_INTERNAL_ERROR   = 3
+    SENSOR_GENERIC_ERROR    = 4
+
+    # The Raspberry Pi clock stretching check runs once per session, on the
+    # first bus access. Set check_clock_stretch to False to skip it.
+    check_clock_stretch = True
+    _RPiCheck = False
+
+    def __init__(self, address=None, i2c_driver=None):
+
+        # Did the user specify an I2C address?
+
+        self.address = address if address is not None else self.available_addresses[0]
+
+        # The I2C driver is loaded on first use, see _get_i2c(). If one
+        # isn't provided, qwiic_i2c creates it.
+        self._i2cSupplied = i2c_driver
+        self._i2cRaw = None
+
+        # Layers on top of the driver: register shadow upkeep, and the optional
+        # statistics and error policy. _i2cDriver is the outermost layer, built
+        # on first use.
+        self._i2cShadow = None
+        self._i2cStats = None
+        self._i2cGuard = None
+        self._i2cDriver = None
+
+        # qir quality values returned from the sensor
+        self.refResistance = 10000.
+        self._resistance = 0.0
+        self._TVOC = 0
+        self._CO2 = 0
+        self.vrefCounts = 0
+        self.ntcCounts = 0
+        self._temperature =  0.0
+        self._lastFrame = None
+
+        # Host side copy of the MEAS_MODE register. None means unknown, and
+        # the next access reads it from the device.
+        self._measMode = None
+
+        # Where data ready (nINT) edges come from. None means poll the status register
+        self._intSource = None
+
+        # Optional history of results, see enable_history()
+        self._history = None
+
+        # IOErrors caught and turned into a return value, by method name
+        self._swallowedErrors = {}
+
+        # Saves and restores the baseline, see BaselineManager
+        self._baselineManager = None
+
+        # Last ENV_DATA written, to skip writing unchanged values.
+        # See set_compensation_policy()
+        self._envData = None
+        self._envWritten = 0.
+        self._envMinChange = 1
+        self._envMaxAge = None
+
+        # Optional NtcTemperatureTable used by read_ntc()
+        self._ntcTable = None
+
+        # Cached result of device_info()
+        self._deviceInfo = None
+
+        # Values written to THRESHOLDS, and the band of the last result seen
+        self._thresholds = (_DEFAULT_LOW_MED, _DEFAULT_MED_HIGH, _DEFAULT_HYSTERESIS)
+        self._co2Band = None
+
+    # ----------------------------------
+    # is_connected()
+    #
+    # Is an actual board connected to our system?
+
+    def is_connected(self):
+        """
+            Determine if a CCS811 device is conntected to the system..
+
+            :return: True if the device is connected, otherwise False.
+            :rtype: bool
+
+        """
+        # use the driver we were given, if it can tell us. The wrapper layers
+        # forward any attribute, so ask the driver itself.
+        driver = self.get_i2c_driver()
+        if hasattr(driver, 'isDeviceConnected'):
+            return driver.isDeviceConnected(self.address)
+
+        return _load_qwiic_i2c().isDeviceConnected(self.address)
+
+    connected = property(is_connected)
+    # ----------------------------------
+    # begin()
+    #
+    # Initialize the system/validate the board.
+    def begin(self, warm=False, timeout=1.0, poll_interval=.01):
+        """
+            Initialize the operation of the Ccs811 module
+
+            Instead of fixed delays, the sensor is polled until it is ready, for
+            at most timeout seconds per step.
+
+            :param warm: If True and the sensor is already running its application
+                        firmware without errors, attach to it without a reset. The
+                        drive mode, baseline and conditioning of the sensor are kept.
+            :param timeout: Seconds to wait for the sensor at each step
+            :param poll_interval: Seconds between polls
+
+            :return: Returns SENSOR_SUCCESS on success, SENSOR_ID_ERROR on bad chip ID
+                or SENSOR_INTERNAL_ERROR.
+            :rtype: integer
+
+        """
+        for delay, result in self._begin_steps(warm, timeout, poll_interval):
+            if delay is None:
+                return result
+            time.sleep(delay)
+
+    # Read a register during begin(), where a NACK means the sensor is not ready yet
+    def _read_if_ready(self, register):
+
+        # The sensor NACKs while it boots, so these polls go around the error
+        # policy - they must not retry, or open the circuit.
+        driver = self._i2c
+        if self._i2cGuard is not None:
+            driver = self._i2cGuard.driver
+
+        try:
+            return driver.readByte(self.address, register)
+        except IOError:
+            return None
+
+    # The steps of begin(), as a generator. Each step yields (delay, None) when
+    # the caller should wait, and the last step yields (None, result). This lets
+    # the blocking and asyncio versions of begin() share the same sequence.
+    def _begin_steps(self, warm=False, timeout=1.0, poll_interval=.01):
+
+        # wait for sensor to come up (answer at all - the ID is checked after the reset)
+        deadline = _monotonic() + timeout
+        chipID = self._read_if_ready(CSS811_HW_ID)
+        while chipID is None and _monotonic() < deadline:
+            yield poll_interval, None
+            chipID = self._read_if_ready(CSS811_HW_ID)
+
+        if chipID is None:
+            yield None, self.SENSOR_ID_ERROR
+            return
+
+        # Already running? Then adopt the current configuration
+        if warm and chipID in _validChipIDs:
+            status = self._read_if_ready(CSS811_STATUS) or 0
+            if status & _STATUS_FW_MODE and status & _STATUS_APP_VALID and not status & _STATUS_ERROR:
+                self._measMode = None
+                self._envData = None
+                self._deviceInfo = None
+                self._get_meas_mode()
+                # the running sensor keeps its learned baseline, but saving starts again
+                if self._baselineManager is not None:
+                    self._baselineManager.start_session()
+                yield None, self.SENSOR_SUCCESS
+                return
+
+        # found it's best to reset the device the try to check chipid.
+        # If the chip is in a bad state, the ID returns 0xFF and needs
+        # a kick.
+
+        data = [0x11, 0xE5, 0x72, 0x8A] # Reset key
+
+        self._i2c.writeBlock(self.address, CSS811_SW_RESET, data)
+        self._measMode = None  # reset clears MEAS_MODE
+        self._envData = None   # and ENV_DATA
+        self._deviceInfo = None
+        self._thresholds = (_DEFAULT_LOW_MED, _DEFAULT_MED_HIGH, _DEFAULT_HYSTERESIS)
+        self._co2Band = None
+
+        # wait for the sensor to come back in boot mode
+        deadline = _monotonic() + timeout
+        while True:
+            yield poll_interval, None
+            status = None
+            chipID = self._read_if_ready(CSS811_HW_ID)
+            if chipID in _validChipIDs:
+                status = self._read_if_ready(CSS811_STATUS)
+            if (status is not None and not status & _STATUS_FW_MODE) or _monotonic() >= deadline:
+                break
+
+        # are we who we need to be?
+        if status is None:
+            if chipID is not None and chipID not in _validChipIDs:
+                print("Invalid Chip ID: 0x%.2X" % chipID)
+            yield None, self.SENSOR_ID_ERROR
+            return
+
+        if status & (_STATUS_ERROR | _STATUS_FW_MODE) or not status & _STATUS_APP_VALID:
+            yield None, self.SENSOR_INTERNAL_ERROR
+            return
+
+        self._i2c.writeCommand(self.address, CSS811_APP_START)
+
+        # wait for the application to start
+        deadline = _monotonic() + timeout
+        status = self._read_if_ready(CSS811_STATUS) or 0
+        while not status & _STATUS_FW_MODE and _monotonic() < deadline:
+            yield poll_interval, None
+            status = self._read_if_ready(CSS811_STATUS) or 0
+
+        if status & _STATUS_ERROR or not status & _STATUS_FW_MODE:
+            yield None, self.SENSOR_INTERNAL_ERROR
+            return
+
+        result = self.set_drive_mode(1)  # read every second
+
+        # put back the baseline saved by an earlier session
+        if self._baselineManager is not None:
+            self._baselineManager.restore()
+
+        yield None, result
+
+    #****************************************************************************#
+    #
+    #   Sensor functions
+    #
+    # ****************************************************************************#
+    # Updates the total voltatile organic compounds (TVOC) in parts per billion (PPB)
+    # and the CO2 value
+    # Returns nothing
+    def read_algorithm_results(self):
+        """
+            Reads the resutls from the sensor and stores internally
+
+            :return: SENSOR_SUCCESS
+            :rtype: integer
+
+        """
+
+        data = self._i2c.readBlock(self.address, CSS811_ALG_RESULT_DATA, 4)
+
+        #  Data ordered:
+        #  co2MSB, co2LSB, tvocMSB, tvocLSB
+
+        self._CO2 = (data[0] << 8) | data[1]
+        self._TVOC = (data[2] << 8) | data[3]
+
+        if self._history is not None:
+            self._history.append(_monotonic(), self._CO2, self._TVOC)
+
+        if self._baselineManager is not None:
+            self._baselineManager.update()
+
+        return self.SENSOR_SUCCESS
+
+    #----------------------------------------------------
+    # Reads the full 8 byte result block in one I2C transaction
+    def read_frame(self):
+        """
+            Reads the complete ALG_RESULT_DATA block (eCO2, TVOC, STATUS, ERROR_ID
+            and RAW_DATA) in a single I2C transaction and stores the results internally.
+
+            This replaces separate calls to data_available(), read_algorithm_results(),
+            check_status_error() and get_error_register(). Check the data_ready
+            attribute of the returned frame to see if the result is new.
+
+            :return: The decoded frame
+            :rtype: CCS811Frame
+
+        """
+
+        frame = _decode_frame(self._i2c.readBlock(self.address, CSS811_ALG_RESULT_DATA, _ALG_RESULT_FRAME_SIZE))
+
+        self._CO2 = frame.co2
+        self._TVOC = frame.tvoc
+        self._lastFrame = frame
+
+        if self._history is not None and frame.data_ready:
+            self._history.append(_monotonic(), frame.co2, frame.tvoc, frame.status)
+
+        if self._baselineManager is not None:
+            self._baselineManager.update()
+
+        return frame
+
+    def get_last_frame(self):
+        """
+            Return the frame from the last call to read_frame().
+
+            :return: The last frame read, or None
+            :rtype: CCS811Frame
+
+        """
+        return self._lastFrame
+
+    last_frame = property(get_last_frame)
+
+    #----------------------------------------------------
+    # I2C driver, loaded on first use
+    def _get_i2c(self):
+
+        driver = self._i2cDriver
+        if driver is None:
+            driver = self._build_i2c()
+        return driver
+
+    def _set_i2c(self, driver):
+
+        self._i2cRaw = driver
+        self._i2cDriver = None
+
+    _i2c = property(_get_i2c, _set_i2c)
+
+    # Stack the enabled layers on the driver: driver <- shadow upkeep <- statistics
+    # <- error policy, so the statistics see every retry.
+    def _build_i2c(self):
+
+        driver = self._i2cRaw
+        if driver is None:
+            driver = self._load_driver()
+
+        if self._i2cShadow is None:
+            self._i2cShadow = _ShadowDriver(self)
+
+        for layer in (self._i2cShadow, self._i2cStats, self._i2cGuard):
+            if layer is not None:
+                layer.driver = driver
+                driver = layer
+
+        self._i2cDriver = driver
+        return driver
+
+    def _load_driver(self):
+
+        # As noted above, to run this device on a Raspberry Pi,
+        # clock streching is needed.
+        #
+        # Lets check if it's enabled. This is done only once in
+        # the session
+        if self.check_clock_stretch and not QwiicCcs811._RPiCheck:
+            _checkForRPiI2CClockStretch()
+            QwiicCcs811._RPiCheck = True
+
+        # load the I2C driver if one isn't provided
+        driver = self._i2cSupplied
+        if driver is None:
+            driver = _load_qwiic_i2c().getI2CDriver()
+            if driver is None:
+                print("Unable to load I2C driver for this platform.")
+                raise IOError("Unable to load I2C driver for this platform.")
+
+        self._i2cRaw = driver
+        return driver
+
+    #----------------------------------------------------
+    # Error policy
+    def set_error_policy(self, policy):
+        """
+            Set how I2C errors are handled. With a policy, failed transactions are
+            retried with backoff, and after too many consecutive failures the sensor
+            is left alone (the circuit opens) - transactions fail at once with
+            CircuitOpenError, without using the bus. After the policy reset_timeout
+            one probe transaction is let through to see if the sensor is back.
+
+            Methods that turn I/O errors into a default value, such as
+            data_available() and get_baseline(), still raise CircuitOpenError,
+            so an open circuit isn't mistaken for a reading.
+
+            :param policy: An ErrorPolicy, or None to call the driver directly
+            :return: No return value
+
+        """
+        self._i2cGuard = _GuardedDriver(policy) if policy is not None else None
+        self._i2cDriver = None
+
+    def get_error_policy(self):
+        """
+            Return the error policy.
+
+            :return: The ErrorPolicy, or None
+            :rtype: ErrorPolicy
+
+        """
+        return self._i2cGuard.policy if self._i2cGuard is not None else None
+
+    error_policy = property(get_error_policy, set_error_policy)
+
+    def get_circuit_state(self):
+        """
+            Return the state of the error policy circuit breaker: CIRCUIT_CLOSED
+            (normal), CIRCUIT_OPEN (sensor is being left alone) or CIRCUIT_HALF_OPEN
+            (probing). Always CIRCUIT_CLOSED without an error policy.
+
+            :rtype: string
+
+        """
+        return self._i2cGuard.state if self._i2cGuard is not None else CIRCUIT_CLOSED
+
+    circuit_state = property(get_circuit_state)
+
+    def error_state(self):
+        """
+            Return the error policy state and counters: state, consecutive_failures,
+            total_failures, retried (retries made), rejected (transactions refused
+            while open) and opened_at (monotonic time the circuit last opened).
+
+            :return: The error state, or None without an error policy
+            :rtype: dict
+
+        """
+        guard = self._i2cGuard
+        if guard is None:
+            return None
+
+        return {'state': guard.state,
+                'consecutive_failures': guard.consecutive_failures,
+                'total_failures': guard.total_failures,
+                'retried': guard.retried,
+                'rejected': guard.rejected,
+                'opened_at': guard.opened_at}
+
+    def reset_circuit(self):
+        """
+            Close the circuit breaker and clear its counters, so transactions
+            are made again right away.
+
+            :return: No return value
+
+        """
+        if self._i2cGuard is not None:
+            self._i2cGuard.reset()
+
+    #----------------------------------------------------
+    # Bus statistics
+    def _count_swallowed(self, method):
+
+        self._swallowedErrors[method] = self._swallowedErrors.get(method, 0) + 1
+
+    def get_i2c_driver(self):
+        """
+            Return the i2c driver object used by the sensor, without the
+            statistics or error policy layers.
+
+            :return: The i2c driver
+            :rtype: Object
+
+        """
+        if self._i2cRaw is None:
+            self._load_driver()
+
+        return self._i2cRaw
+
+    i2c_driver = property(get_i2c_driver)
+
+    def enable_stats(self):
+        """
+            Start counting I2C transactions, bytes, errors and latency per register.
+            When not enabled, the driver is called directly.
+
+            :return: No return value
+
+        """
+        if self._i2cStats is None:
+            self._i2cStats = _InstrumentedDriver()
+            self._i2cDriver = None
+
+    def disable_stats(self):
+        """
+            Stop collecting I2C statistics.
+
+            :return: No return value
+
+        """
+        self._i2cStats = None
+        self._i2cDriver = None
+
+    def stats(self, reset=False):
+        """
+            Return I2C statistics for the sensor.
+
+            The 'registers' entry maps register names (for example 'CSS811_STATUS')
+            to transactions, bytes_read, bytes_written, errors, total_time (seconds) and
+            latency_histogram, counts per LATENCY_BUCKETS_US bucket. It is empty unless
+            enable_stats() was called. The 'swallowed_errors' entry counts IOErrors that
+            data_available(), app_valid(), get_error_register() and get_baseline()
+            turned into a return value.
+
+            :param reset: Clear the statistics after reading them
+
+            :return: The statistics
+            :rtype: dict
+
+        """
+        registers = {}
+        if self._i2cStats is not None:
+            for register, values in self._i2cStats.registers.items():
+                registers[_REGISTER_NAMES.get(register, '0x%.2X' % register)] = values.as_dict()
+
+        result = {'registers': registers, 'swallowed_errors': dict(self._swallowedErrors)}
+
+        if reset:
+            self.reset_stats()
+
+        return result
+
+    def reset_stats(self):
+        """
+            Clear the I2C statistics.
+
+            :return: No return value
+
+        """
+        self._swallowedErrors = {}
+        if self._i2cStats is not None:
+            self._i2cStats.registers = {}
+
+    #----------------------------------------------------
+    # Device identity and configuration
+    def device_info(self, refresh=False):
+        """
+            Return the identity and configuration of the sensor: hardware ID and
+            version, boot and application firmware versions, MEAS_MODE and baseline.
+
+            The registers are read on the first call and the result is kept until
+            the sensor is reset by begin(). The meas_mode and drive_mode fields
+            follow the host copy of MEAS_MODE, so they reflect set_drive_mode() and
+            the other mode setters. The baseline field is the value last read, or
+            last written with set_baseline(); the sensor updates its baseline as
+            it learns, so use refresh or get_baseline() for the current value.
+
+            :param refresh: Read the registers again
+
+            :return: The device information
+            :rtype: CCS811DeviceInfo
+
+        """
+        if self._deviceInfo is None or refresh:
+            self._deviceInfo = CCS811DeviceInfo(
+                self.address,
+                self._i2c.readByte(self.address, CSS811_HW_ID),
+                self._i2c.readByte(self.address, CSS811_HW_VERSION),
+                _format_version(self._i2c.readBlock(self.address, CSS811_FW_BOOT_VERSION, 2)),
+                _format_version(self._i2c.readBlock(self.address, CSS811_FW_APP_VERSION, 2)),
+                None,
+                None,
+                self._i2c.readWord(self.address, CSS811_BASELINE))
+
+        measMode = self._get_meas_mode()
+        if self._deviceInfo.meas_mode != measMode:
+            self._deviceInfo = self._deviceInfo._replace(
+                meas_mode=measMode,
+                drive_mode=(measMode & _MEAS_MODE_DRIVE_MASK) >> _MEAS_MODE_DRIVE_SHIFT)
+
+        return self._deviceInfo
+
+    def invalidate_device_info(self):
+        """
+            Drop the cached device_info() result.
+
+            :return: No return value
+
+        """
+        self._deviceInfo = None
+
+    #----------------------------------------------------
+    # Optional history of results
+    def enable_history(self, capacity=3600, windows=(60,)):
+        """
+            Keep a bounded history of results. Every new result from read_algorithm_results()
+            or read_frame() is added, and read_ntc() fills in the temperature of the newest one.
+
+            :param capacity: The maximum number of samples kept.
+            :param windows: Window sizes, in samples, for rolling statistics.
+
+            :return: The history object
+            :rtype: SampleHistory
+
+        """
+        self._history = SampleHistory(capacity, windows)
+        return self._history
+
+    def disable_history(self):
+        """
+            Stop keeping a history of results.
+
+            :return: No return value
+
+        """
+        self._history = None
+
+    def get_history(self):
+        """
+            Return the history of results.
+
+            :return: The history, or None if not enabled
+            :rtype: SampleHistory
+
+        """
+        return self._history
+
+    history = property(get_history)
+
+    #----------------------------------------------------
+    # Checks to see if error bit is set
+    def check_status_error(self):
+        """
+            Returns  if the Error bit on the sensor is set.
+
+            :return: value of Error bit
+            :rtype: integer
+
+        """
+        # return the status bit
+        value = self._i2c.readByte(self.address, CSS811_STATUS)
+
+        return value & 1 << 0
+
+    #----------------------------------------------------
+    # Checks to see if DATA_READ flag is set in the status register
+    def data_available(self):
+        """
+            Returns True if data is available on the sensor
+
+            :return: True if data is available.
+            :rtype: bool
+
+        """
+
+        try:
+            value = self._i2c.readByte(self.address, CSS811_STATUS)
+        except CircuitOpenError:
+            raise
+        except IOError:
+            self._count_swallowed('data_available')
+            value = 0  # This will return 0
+
+        return value & 1 << 3 != 0
+
+    #----------------------------------------------------
+    # Checks to see if APP_VALID flag is set in the status register
+    def app_valid(self):
+        """
+            Returns True if if the sensor APP_VALID bit is set in the status register
+
+            :return: True if APP_VALID is set
+            :rtype: bool
+
+        """
+
+        try:
+            value = self._i2c.readByte(self.address, CSS811_STATUS)
+        except CircuitOpenError:
+            raise
+        except IOError:
+            self._count_swallowed('app_valid')
+            value = 0  # This will return 0
+
+        return value & 1 << 4 != 0
+
+    def get_error_register(self):
+
+        """
+            Returns the value of the sensors error Register
+
+            :return: Error register
+            :rtype: int
+
+        """
+        try:
+            value = self._i2c.readByte(self.address, CSS811_ERROR_ID)
+        except CircuitOpenError:
+            raise
+        except IOError:
+            self._count_swallowed('get_error_register')
+            value = 0xFF
+
+        return value  # Send all errors in the event of communication error
+
+    error_register = property(get_error_register)
+
+    # Returns the baseline value
+    # Used for telling sensor what 'clean' air is
+    # You must put the sensor in clean air and record this value
+    def get_baseline(self):
+        """
+            Returns the baseline value
+            Used for telling sensor what 'clean' air is
+            You must put the sensor in clean air and record this value
+
+            :return: Baseline value for the sensor
+            :rtype: integer
+
+        """
+        try:
+            value = self._i2c.readWord(self.address, CSS811_BASELINE)
+        except CircuitOpenError:
+            raise
+        except IOError:
+            self._count_swallowed('get_baseline')
+            value = 0
+
+        return value
+
+    #----------------------------------------------------
+    def set_baseline(self, input_val):
+        """
+            Set the baseline value for the sensor
+
+            :return: SENSOR_SUCCESS
+            :rtype: integer
+        """
+
+        data = bytearray(2)
+        data[0] = (input_val >> 8) & 0x00FF
+        data[1] = input_val & 0x00FF
+
+        self._i2c.writeWord(self.address, CSS811_BASELINE, input_val)
+
+        if self._deviceInfo is not None:
+            self._deviceInfo = self._deviceInfo._replace(baseline=input_val)
+
+        return self.SENSOR_SUCCESS
+
+    baseline = property(get_baseline, set_baseline)
+
+    def get_baseline_manager(self):
+        """
+            Return the BaselineManager attached to the sensor.
+
+            :return: The baseline manager, or None
+            :rtype: BaselineManager
+
+        """
+        return self._baselineManager
+
+    def set_baseline_manager(self, manager):
+        """
+            Attach a BaselineManager. begin() then restores the saved baseline
+            (or, attaching warm to a running sensor, keeps the one it has),
+            and each result read gives the manager a chance to save a new one.
+
+            :param manager: The baseline manager, or None to detach
+            :return: No return value
+
+        """
+        self._baselineManager = manager
+
+    baseline_manager = property(get_baseline_manager, set_baseline_manager)
+    #----------------------------------------------------
+    # MEAS_MODE shadow register
+    #
+    # The value of MEAS_MODE is kept on the host, so field changes don't need a
+    # read-modify-write on the bus. The shadow is filled on first use (begin())
+    # and dropped on a SW reset or any I/O error (see _ShadowDriver), as the
+    # device may have been reset.
+    def _get_meas_mode(self):
+
+        if self._measMode is None:
+            self._measMode = self._i2c.readByte(self.address, CSS811_MEAS_MODE)
+
+        return self._measMode
+
+    def _write_meas_mode(self, value):
+
+        self._i2c.writeByte(self.address, CSS811_MEAS_MODE, value)
+        self._measMode = value
+
+    def _drop_shadows(self):
+
+        # MEAS_MODE and ENV_DATA are cleared by a device reset
+        self._measMode = None
+        self._envData = None
+
+    def invalidate_meas_mode(self):
+        """
+            Drop the host copy of the MEAS_MODE register, forcing the next
+            mode change to read the value from the sensor.
+
+            :return: No return value
+
+        """
+        self._measMode = None
+
+    def get_meas_mode(self):
+        """
+            Return the value of the MEAS_MODE register. The host copy is
+            used when available, otherwise the register is read.
+
+            :return: The MEAS_MODE register value
+            :rtype: integer
+
+        """
+        return self._get_meas_mode()
+
+    meas_mode = property(get_meas_mode)
+
+    #----------------------------------------------------
+    # Set several MEAS_MODE fields with one write
+    def set_meas_mode(self, drive_mode=None, interrupt=None, threshold=None):
+        """
+            Update one or more fields of the MEAS_MODE register in a single
+            write. Fields left as None are unchanged.
+
+            :param drive_mode: The drive mode, see set_drive_mode()
+            :param interrupt: True to enable the nINT data ready interrupt
+            :param threshold: True to only interrupt on threshold crossings
+
+            :return: SENSOR_SUCCESS
+            :rtype: integer
+
+        """
+
+        value = self._get_meas_mode()
+
+        if drive_mode is not None:
+            if drive_mode > 4:
+                drive_mode = 4 # sanitize input
+
+            value &= (~_MEAS_MODE_DRIVE_MASK) & 0xFF  # Clear DRIVE_MODE bits. Just 1st byte
+            value |= (drive_mode << _MEAS_MODE_DRIVE_SHIFT)  #Mask in mode
+
+        if interrupt is not None:
+            if interrupt:
+                value |= _MEAS_MODE_INT_DATARDY
+            else:
+                value &= (~_MEAS_MODE_INT_DATARDY) & 0xFF
+
+        if threshold is not None:
+            if threshold:
+                value |= _MEAS_MODE_INT_THRESH
+            else:
+                value &= (~_MEAS_MODE_INT_THRESH) & 0xFF
+
+        if value != self._measMode:
+            self._write_meas_mode(value)
+
+        return self.SENSOR_SUCCESS
+
+    #----------------------------------------------------
+    # Enable the nINT signal
+    def enable_interrupts(self):
+        """
+            Set the Interrupt bit in the sensor and enable Interrupts
+            on the sensor
+
+            :return: SENSOR_SUCCESS
+            :rtype: integer
+
+        """
+        return self.set_meas_mode(interrupt=True)
+
+    #----------------------------------------------------
+    # Disable the nINT signal
+    def disable_interrupts(self):
+        """
+            Clear the Interrupt bit in the sensor and disable Interrupts
+            on the sensor
+
+            :return: SENSOR_SUCCESS
+            :rtype: integer
+
+        """
+        return self.set_meas_mode(interrupt=False)
+
+    #----------------------------------------------------
+    # Mode 0 = Idle
+    # Mode 1 = read every 1s
+    # Mode 2 = every 10s
+    # Mode 3 = every 60s
+    # Mode 4 = RAW mode
+    def set_drive_mode(self,  mode):
+        """
+            Set the Drive mode for the sensor
+
+            :param mode: Valid values are:
+                    0 = Idle, 1 = read every 1s, 2 = every 10s, 3 = every 60s, 4 = RAW mode
+
+            :return: SENSOR_SUCCESS
+            :rtype: integer
+
+        """
+        return self.set_meas_mode(drive_mode=mode)
+
+    def get_drive_mode(self):
+        """
+            Return the current drive mode of the sensor.
+
+            :return: The drive mode, 0 - 4
+            :rtype: integer
+
+        """
+        return (self._get_meas_mode() & _MEAS_MODE_DRIVE_MASK) >> _MEAS_MODE_DRIVE_SHIFT
+
+    drive_mode = property(get_drive_mode, set_drive_mode)
+
+    def get_sample_period(self):
+        """
+            Return the number of seconds between results for the current
+            drive mode.
+
+            :return: The sample period in seconds, or None in idle mode (0)
+            :rtype: float
+
+        """
+        return _DRIVE_MODE_PERIODS.get(self.get_drive_mode())
+
+    sample_period = property(get_sample_period)
+
+    #----------------------------------------------------
+    # Drive mode aware sample iterator
+    #
+    # See _SampleCadence for how the arrival time of results is tracked.
+    _ITER_IDLE_CHECK = 1.0  # seconds between mode checks when the sensor is idle
+
+    # One byte STATUS read, for polling between results
+    def _read_status(self):
+
+        return self._i2c.readByte(self.address, CSS811_STATUS)
+
+    def iter_samples(self, max_samples=None):
+        """
+            Generator that yields each new result from the sensor exactly once.
+
+            The period of the current drive mode is used as a starting point and
+            the actual cadence of the sensor is learned as results arrive, so the
+            generator sleeps until just after each result instead of polling.
+            Polls read only the status register; the result frame is read once
+            per sample.
+
+            While the sensor is idle, or if no result arrives for two periods, the
+            drive mode is read back from the sensor, in case it was reset or changed
+            by someone else.
+
+            :param max_samples: Stop after this many samples. None to run forever.
+
+            :return: Yields (timestamp, frame) tuples. The timestamp is from a
+                    monotonic clock, taken when the result was read.
+            :rtype: tuple
+
+        """
+
+        cadence = None
+        count = 0
+
+        while max_samples is None or count < max_samples:
+
+            period = self.get_sample_period()
+            if period is None:
+                cadence = None
+                time.sleep(self._ITER_IDLE_CHECK)
+                self.invalidate_meas_mode()
+                continue
+
+            if cadence is None or cadence.nominal != period:
+                # new drive mode, start learning again
+                cadence = _SampleCadence(period)
+
+            wake = cadence.next_read()
+            if wake is not None:
+                delay = wake - _monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+            step = cadence.step
+            polls = 0
+            ready = self._read_status() & _STATUS_DATA_READY
+            while not ready and polls < cadence.max_polls:
+                polls += 1
+                time.sleep(step)
+                ready = self._read_status() & _STATUS_DATA_READY
+
+            if not ready:
+                cadence.lost()
+                self.invalidate_meas_mode()
+                continue
+
+            frame = self.read_frame()
+            if not frame.data_ready:
+                # someone else read the result first
+                continue
+
+            now = _monotonic()
+            cadence.found(now, polls)
+
+            count += 1
+            yield now, frame
+
+    #----------------------------------------------------
+    # RAW_DATA (drive mode 4) streaming
+    def read_raw_data(self):
+        """
+            Read the RAW_DATA register: the current through the sensor and the
+            voltage across it.
+
+            :return: (current in uA, voltage in volts)
+            :rtype: tuple
+
+        """
+        data = self._i2c.readBlock(self.address, CSS811_RAW_DATA, 2)
+        current, rawADC = _decode_raw(data[0], data[1])
+        return current, raw_adc_to_voltage(rawADC)
+
+    def iter_raw_batches(self, batch_size=16, max_batches=None):
+        """
+            Generator that streams raw samples in batches, putting the sensor in
+            drive mode 4 (a raw sample every 250 ms) if it isn't already.
+
+            Samples are read with iter_samples(), so each is read once, on a schedule
+            that follows the sensor clock rather than drifting with host delays, and
+            polls read only the status register. Each sample is then read from the
+            8 byte ALG_RESULT_DATA block, which carries RAW_DATA in its last two
+            bytes: reading it is what clears DATA_READY, so the 2 byte RAW_DATA
+            register alone can't be used to tell new samples from old ones.
+
+            To stream from several sensors, see Ccs811Group.iter_raw_batches().
+
+            :param batch_size: Number of samples in each batch
+            :param max_batches: Stop after this many batches. None to run forever.
+
+            :return: Yields CCS811RawBatch objects
+            :rtype: CCS811RawBatch
+
+        """
+        if self.get_drive_mode() != 4:
+            self.set_drive_mode(4)
+
+        batches = 0
+        batch = _new_raw_batch()
+
+        for timestamp, frame in self.iter_samples():
+
+            batch.append(timestamp, frame)
+
+            if len(batch) >= batch_size:
+                yield batch
+                batches += 1
+                if max_batches is not None and batches >= max_batches:
+                    return
+                batch = _new_raw_batch()
+
+    #----------------------------------------------------
+    # Data ready notification via the nINT pin
+    def set_interrupt_source(self, source, enable=True):
+        """
+            Set where wait_for_data() gets nINT edges from.
+
+            :param source: An object with a wait(timeout) method, such as
+                        FdEdgeSource for a GPIO line event fd, a callable taking
+                        a timeout, or None to poll the status register instead.
+            :param enable: If True, the data ready interrupt is enabled (or
+                        disabled when source is None) on the sensor.
+
+            :return: SENSOR_SUCCESS
+            :rtype: integer
+
+        """
+        self._intSource = _make_edge_source(source)
+
+        if enable:
+            return self.set_meas_mode(interrupt=self._intSource is not None)
+
+        return self.SENSOR_SUCCESS
+
+    def get_interrupt_source(self):
+        """
+            Return the current nINT edge source.
+
+            :return: The edge source, or None when polling
+            :rtype: Object
+
+        """
+        return self._intSource
+
+    interrupt_source = property(get_interrupt_source, set_interrupt_source)
+
+    def wait_for_data(self, timeout=None, poll_interval=None):
+        """
+            Wait for a new result and read it.
+
+            With an interrupt source set, this blocks on the nINT edge and then reads
+            the result frame, so no status reads are made between samples. Otherwise
+            the status register is polled.
+
+            :param timeout: Seconds to wait, None to wait forever
+            :param poll_interval: Seconds between status reads when polling. Defaults
+                        to a tenth of the drive mode period.
+
+            :return: The new frame, or None if the timeout expired
+            :rtype: CCS811Frame
+
+        """
+
+        deadline = None if timeout is None else _monotonic() + timeout
+
+        while True:
+
+            remaining = None if deadline is None else max(0., deadline - _monotonic())
+
+            if self._intSource is not None:
+                if self._intSource.wait(remaining):
+                    frame = self.read_frame()
+                    if frame.data_ready:
+                        return frame
+            else:
+                if self.data_available():
+                    return self.read_frame()
+
+                interval = poll_interval
+                if interval is None:
+                    interval = (self.get_sample_period() or 1.0) / 10.
+                if remaining is not None:
+                    interval = min(interval, remaining)
+                time.sleep(interval)
+
+            if deadline is not None and _monotonic() >= deadline:
+                return None
+
+    #----------------------------------------------------
+    # Threshold interrupts
+    #
+    # With INT_THRESH set, the sensor only asserts nINT when eCO2 moves to a
+    # different band: low (< low_med), medium or high (> med_high).
+    def set_thresholds(self, low_med, med_high, hysteresis=_DEFAULT_HYSTERESIS):
+        """
+            Set the eCO2 thresholds used by the threshold interrupt.
+
+            :param low_med: The low to medium threshold, in ppm
+            :param med_high: The medium to high threshold, in ppm
+            :param hysteresis: How far, in ppm, eCO2 must pass a threshold to change band
+
+            :return: SENSOR_SUCCESS, or SENSOR_GENERIC_ERROR for invalid values
+            :rtype: integer
+
+        """
+        if not 0 <= low_med < med_high <= 0xFFFF or not 0 <= hysteresis <= 0xFF:
+            return self.SENSOR_GENERIC_ERROR
+
+        data = [(low_med >> 8) & 0xFF, low_med & 0xFF,
+                (med_high >> 8) & 0xFF, med_high & 0xFF,
+                hysteresis]
+
+        self._i2c.writeBlock(self.address, CSS811_THRESHOLDS, data)
+        self._thresholds = (low_med, med_high, hysteresis)
+
+        return self.SENSOR_SUCCESS
+
+    def get_thresholds(self):
+        """
+            Return the thresholds last written with set_thresholds().
+
+            :return: (low_med, med_high, hysteresis)
+            :rtype: tuple
+
+        """
+        return self._thresholds
+
+    thresholds = property(get_thresholds)
+
+    def enable_threshold_interrupts(self, low_med=None, med_high=None, hysteresis=_DEFAULT_HYSTERESIS):
+        """
+            Only assert nINT when eCO2 changes band. Optionally sets the thresholds
+            first. Use with wait_for_band_change() and an interrupt source.
+
+            :param low_med: The low to medium threshold, in ppm
+            :param med_high: The medium to high threshold, in ppm
+            :param hysteresis: How far, in ppm, eCO2 must pass a threshold to change band
+
+            :return: A SENSOR_ status code
+            :rtype: integer
+
+        """
+        if low_med is not None and med_high is not None:
+            result = self.set_thresholds(low_med, med_high, hysteresis)
+            if result != self.SENSOR_SUCCESS:
+                return result
+
+        # the threshold interrupt needs the data ready interrupt enabled too
+        return self.set_meas_mode(interrupt=True, threshold=True)
+
+    def disable_threshold_interrupts(self):
+        """
+            Go back to asserting nINT for every new result.
+
+            :return: SENSOR_SUCCESS
+            :rtype: integer
+
+        """
+        return self.set_meas_mode(threshold=False)
+
+    def get_co2_band(self):
+        """
+            Return the band of the last eCO2 value read, using the current thresholds.
+
+            :return: CO2_BAND_LOW, CO2_BAND_MEDIUM or CO2_BAND_HIGH
+            :rtype: integer
+
+        """
+        lowMed, medHigh, hysteresis = self._thresholds
+        return co2_band(self._CO2, lowMed, medHigh, hysteresis, self._co2Band)
+
+    co2_band = property(get_co2_band)
+
+    def wait_for_band_change(self, timeout=None):
+        """
+            Wait until eCO2 moves to a different band.
+
+            With threshold interrupts enabled and an interrupt source set, the
+            sensor only wakes the host on a band change. Otherwise each new
+            result is checked on the host.
+
+            :param timeout: Seconds to wait, None to wait forever
+
+            :return: The frame with the new band, or None if the timeout expired
+            :rtype: CCS811Frame
+
+        """
+        deadline = None if timeout is None else _monotonic() + timeout
+        lowMed, medHigh, hysteresis = self._thresholds
+
+        while True:
+            remaining = None if deadline is None else max(0., deadline - _monotonic())
+            frame = self.wait_for_data(remaining)
+            if frame is None:
+                return None
+
+            band = co2_band(frame.co2, lowMed, medHigh, hysteresis, self._co2Band)
+            if band != self._co2Band:
+                self._co2Band = band
+                return frame
+
+    #----------------------------------------------------
+    ## Given a temp and humidity, write this data to the CSS811 for better compensation
+    ## This function expects the humidity and temp to come in as floats
+    def set_environmental_data(self, relativeHumidity, temperature, force=False):
+        """
+            Given a temp and humidity, write this data to the CSS811 for better compensation
+            This function expects the humidity and temp to come in as floats
+
+            The sensor only takes values in 0.5 steps. If the encoded values haven't
+            changed since the last write, the write is skipped. See
+            set_compensation_policy() to tune when the values are written.
+
+            :param relativeHumidity: The relativity Humity for the sensor to use
+            :param temperature: The temperature for the sensor to use
+            :param force: Write the values even if they haven't changed
+
+            :return: one of the SENSOR_ return codes.
+            :rtype: integer
+
+        """
+
+        # Check for invalid temperatures
         if temperature < -25 or temperature > 50:
             return self.SENSOR_GENERIC_ERROR
 
@@ -563,10 +2446,37 @@ class QwiicCcs811(object):
         # Correct rounding
         envData[2] = (temp + 250) // 500
         envData[3] = 0
+
+        # Skip the write if the sensor already has these values
+        if not force and self._envData is not None:
+            minChange = self._envMinChange
+            if abs(envData[0] - self._envData[0]) < minChange and \
+                    abs(envData[2] - self._envData[2]) < minChange:
+                if self._envMaxAge is None or _monotonic() - self._envWritten < self._envMaxAge:
+                    return self.SENSOR_SUCCESS
+
         self._i2c.writeBlock(self.address, CSS811_ENV_DATA, envData)
+        self._envData = envData
+        self._envWritten = _monotonic()
 
         return self.SENSOR_SUCCESS
 
+    def set_compensation_policy(self, min_change=1, max_age=None):
+        """
+            Set when set_environmental_data() writes to the sensor.
+
+            :param min_change: Minimum change, in 0.5 steps of humidity or temperature,
+                        from the last values written before new values are written.
+                        The default of 1 writes on any change the sensor can see.
+            :param max_age: Write the values anyway if the last write is older than
+                        this number of seconds. None to never refresh unchanged values.
+
+            :return: No return value
+
+        """
+        self._envMinChange = max(1, int(min_change))
+        self._envMaxAge = max_age
+
     #----------------------------------------------------
     def set_reference_resistance(self, input_val):
         """
@@ -591,6 +2501,16 @@ class QwiicCcs811(object):
 
     referance_resistance = property(get_reference_resistance, set_reference_resistance)
 
+    def set_ntc_table(self, table):
+        """
+            Use a precomputed table to convert NTC resistance to temperature in read_ntc().
+
+            :param table: An NtcTemperatureTable, or None to compute each value
+            :return: No return value
+
+        """
+        self._ntcTable = table
+
     #----------------------------------------------------
     def read_ntc(self):
         """
@@ -610,20 +2530,21 @@ class QwiicCcs811(object):
 
         self.ntcCounts = (data[2] << 8) | data[3]
 
-        self._resistance = self.ntcCounts * self.refResistance / float(self.vrefCounts)
+        self._resistance = ntc_resistance(self.vrefCounts, self.ntcCounts, self.refResistance)
 
+        if self._ntcTable is not None:
+            temperature = self._ntcTable.temperature(self._resistance)
+        else:
+            temperature = ntc_temperature(self._resistance)
 
-        # Code from Milan Malesevic and Zoran Stupic, 2011,
-        # Modified by Max Mayfield,
-        if self._resistance == 0:
-            # we had an error of some sorts. Log 0 is not a happy value
-            print("Error - Invalid received from sensor")
+        if math.isnan(temperature):
+            # we had an error of some sorts.
             return 1
 
-        self._temperature = math.log(int(self._resistance))
-        self._temperature = 1 / (0.001129148 + (0.000234125 * self._temperature) + \
-               (0.0000000876741 * self._temperature * self._temperature * self._temperature))
-        self._temperature = self._temperature - 273.15  # Convert Kelvin to Celsius
+        self._temperature = temperature
+
+        if self._history is not None:
+            self._history.set_last_temperature(self._temperature)
 
         return self.SENSOR_SUCCESS
 
@@ -680,3 +2601,690 @@ class QwiicCcs811(object):
         return self._temperature
 
     temperature = property(get_temperature)
+
+
+#======================================================================
+# BaselineManager
+#
+# Keeps the sensor baseline across restarts, so the sensor doesn't need to
+# re-learn it after every begin().
+#======================================================================
+
+# All managers in the process share the store files, so writes are serialized
+_baselineStoreLock = threading.Lock()
+
+class BaselineManager(object):
+    """
+    BaselineManager
+
+        Saves the BASELINE register of a sensor to a file on a schedule and
+        writes it back after begin(), if it isn't too old.
+
+        The file is a JSON object holding one entry per sensor, keyed by bus,
+        address and the hardware and firmware versions of the sensor, so several
+        sensors can share a file. Updates are written to a temporary file that
+        then replaces the store, so a crash never leaves a partial file.
+
+        :param sensor: The QwiicCcs811 object to manage. The manager attaches
+                        itself, see QwiicCcs811.set_baseline_manager()
+        :param path: The file to keep baselines in
+        :param bus: A name for the I2C bus of the sensor, used in the key.
+        :param interval: Seconds between saves
+        :param max_age: Saved baselines older than this (seconds) are not restored
+        :param min_runtime: Seconds the sensor must run after begin() before the
+                        first save, so a fresh baseline doesn't replace a learned one.
+        :return: The baseline manager object.
+        :rtype: Object
+    """
+
+    def __init__(self, sensor, path, bus=None, interval=3600., max_age=24 * 3600., min_runtime=20 * 60.):
+
+        self.sensor = sensor
+        self.path = path
+        self.bus = 'default' if bus is None else str(bus)
+        self.interval = interval
+        self.max_age = max_age
+        self.min_runtime = min_runtime
+
+        self._key = None
+        self._started = None
+        self._nextSave = None
+
+        # a manager attached to a running sensor times its session from now;
+        # begin() starts it again
+        self.start_session()
+
+        sensor.set_baseline_manager(self)
+
+    #----------------------------------------------------
+    # Store access
+    def _read_store(self):
+
+        import json  # pylint: disable=import-outside-toplevel
+
+        try:
+            with open(self.path) as fStore:
+                return json.load(fStore)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def _write_store(self, store):
+
+        import json  # pylint: disable=import-outside-toplevel
+
+        tmpPath = '%s.%d.tmp' % (self.path, os.getpid())
+        with open(tmpPath, 'w') as fStore:
+            json.dump(store, fStore, indent=1, sort_keys=True)
+            fStore.flush()
+            os.fsync(fStore.fileno())
+
+        # atomic on POSIX, and on Windows with os.replace()
+        getattr(os, 'replace', os.rename)(tmpPath, self.path)
+
+    def get_key(self):
+        """
+            Return the store key of the sensor. Reads the version registers
+            the first time.
+
+            :return: The key
+            :rtype: string
+        """
+        if self._key is None:
+            info = self.sensor.device_info()
+            self._key = '%s/0x%.2X/hw%.2X/fw%s' % (self.bus, info.address, info.hw_version, info.fw_app_version)
+        return self._key
+
+    key = property(get_key)
+
+    def load(self):
+        """
+            Return the saved entry for the sensor.
+
+            :return: Dictionary with 'baseline' and 'saved' (wall clock time), or None
+            :rtype: dict
+        """
+        with _baselineStoreLock:
+            return self._read_store().get(self.get_key())
+
+    #----------------------------------------------------
+    # Save and restore
+    def start_session(self):
+        """
+            Start timing a session, without touching the sensor baseline. Called
+            when the manager is created, by QwiicCcs811.begin() when it attaches
+            to a sensor that is already running, and by restore().
+
+            :return: No return value
+        """
+        self._started = _monotonic()
+        self._nextSave = self._started + max(self.min_runtime, self.interval)
+
+    def restore(self):
+        """
+            Write the saved baseline to the sensor, if there is one and it is
+            fresh enough. Called by QwiicCcs811.begin().
+
+            :return: True if a baseline was restored
+            :rtype: bool
+        """
+        # begin() started a new session
+        self.start_session()
+
+        try:
+            entry = self.load()
+            if entry is None or time.time() - entry['saved'] > self.max_age:
+                return False
+
+            self.sensor.set_baseline(entry['baseline'])
+        except IOError:
+            return False
+
+        # a restored baseline is already learned - no need to wait for min_runtime
+        self._nextSave = _monotonic() + self.interval
+        return True
+
+    def save(self):
+        """
+            Read the baseline from the sensor and save it now.
+
+            :return: The saved baseline
+            :rtype: integer
+        """
+        sensor = self.sensor
+        value = sensor._i2c.readWord(sensor.address, CSS811_BASELINE)
+        key = self.get_key()
+
+        with _baselineStoreLock:
+            store = self._read_store()
+            store[key] = {'baseline': value, 'saved': time.time()}
+            self._write_store(store)
+
+        self._nextSave = _monotonic() + self.interval
+        return value
+
+    def update(self):
+        """
+            Save the baseline if a save is due. Cheap when nothing is due, so it
+            can be called for every sample. QwiicCcs811 calls this when a result is read.
+
+            :return: True if the baseline was saved
+            :rtype: bool
+        """
+        if self._nextSave is None or _monotonic() < self._nextSave:
+            return False
+
+        try:
+            self.save()
+        except (IOError, OSError):
+            # try again at the next interval
+            self._nextSave = _monotonic() + self.interval
+            return False
+
+        return True
+
+
+#======================================================================
+# Firmware update
+#
+# The boot loader takes a new application image through three registers:
+# APP_ERASE (with a key) clears the application, APP_DATA takes the image
+# 8 bytes at a time and APP_VERIFY checks it. The STATUS register reports
+# when the erase and verify are done.
+#======================================================================
+
+_RESET_KEY = [0x11, 0xE5, 0x72, 0x8A]
+_ERASE_KEY = [0xE7, 0xA7, 0xE6, 0x09]
+_APP_DATA_CHUNK = 8
+
+class Ccs811FirmwareUpdater(object):
+    """
+    Ccs811FirmwareUpdater
+
+        Loads a new application firmware image into a sensor through the boot loader.
+
+        Chunks are written back to back with chunk_delay between them, and the
+        erase and verify steps poll the STATUS register instead of waiting a
+        fixed time. A chunk that fails is retried. If the update still fails
+        while writing, calling update() again with the same image resumes from
+        the failed chunk, as long as the sensor wasn't reset in between.
+
+        :param sensor: The QwiicCcs811 object to update
+        :param chunk_delay: Seconds to wait after each 8 byte chunk, for the flash write
+        :param timeout: Seconds to wait for each erase, verify or reset step
+        :param poll_interval: Seconds between STATUS polls
+        :param retries: Number of times a failed chunk is retried
+        :param progress: Called as progress(sensor, written, total) after each chunk
+        :return: The updater object.
+        :rtype: Object
+    """
+
+    # States, see get_state()
+    STATE_IDLE      = 'idle'
+    STATE_ERASE     = 'erase'
+    STATE_WRITE     = 'write'
+    STATE_VERIFY    = 'verify'
+    STATE_DONE      = 'done'
+    STATE_FAILED    = 'failed'
+
+    def __init__(self, sensor, chunk_delay=.05, timeout=2.0, poll_interval=.01, retries=3, progress=None):
+
+        self.sensor = sensor
+        self.chunk_delay = chunk_delay
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.retries = retries
+        self.progress = progress
+
+        self._state = self.STATE_IDLE
+        self._image = None
+        self._offset = 0
+        self.error = None
+
+    def get_state(self):
+        """
+            Return the state of the update: 'idle', 'erase', 'write', 'verify',
+            'done' or 'failed'.
+
+            :rtype: string
+        """
+        return self._state
+
+    state = property(get_state)
+
+    def get_written(self):
+        """
+            Return the number of image bytes written so far.
+
+            :rtype: integer
+        """
+        return self._offset
+
+    written = property(get_written)
+
+    def _read_status(self):
+
+        sensor = self.sensor
+        try:
+            return sensor._i2c.readByte(sensor.address, CSS811_STATUS)
+        except IOError:
+            return None
+
+    # Poll STATUS until all the given bits are set
+    def _wait_status(self, bits, clear=0):
+
+        deadline = _monotonic() + self.timeout
+        while True:
+            status = self._read_status()
+            if status is not None and status & bits == bits and not status & clear:
+                return status
+            if _monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def _fail(self, message):
+
+        self._state = self.STATE_FAILED
+        self.error = message
+        return self.sensor.SENSOR_INTERNAL_ERROR
+
+    def _write_chunk(self, chunk):
+
+        sensor = self.sensor
+        for attempt in range(self.retries + 1):
+            try:
+                sensor._i2c.writeBlock(sensor.address, CSS811_APP_DATA, chunk)
+                return True
+            except IOError:
+                if attempt < self.retries:
+                    time.sleep(self.chunk_delay + self.poll_interval)
+        return False
+
+    def update(self, image, start_app=True):
+        """
+            Load a firmware image into the sensor.
+
+            :param image: The image, as bytes. Its length must be a multiple of 8
+            :param start_app: Start the new application (with begin()) when done
+
+            :return: SENSOR_SUCCESS, or SENSOR_INTERNAL_ERROR with the reason in
+                    the error attribute
+            :rtype: integer
+        """
+        sensor = self.sensor
+        image = bytearray(image)
+        if not image or len(image) % _APP_DATA_CHUNK:
+            raise ValueError("Firmware image length must be a non-zero multiple of %d" % _APP_DATA_CHUNK)
+
+        self.error = None
+
+        # resume a failed write, if the boot loader is still where we left it
+        resume = False
+        if self._state == self.STATE_FAILED and self._image == image and self._offset:
+            status = self._read_status()
+            resume = status is not None and not status & _STATUS_FW_MODE and status & _STATUS_APP_ERASE
+
+        if not resume:
+            self._image = image
+            self._offset = 0
+
+            # into the boot loader
+            self._state = self.STATE_ERASE
+            try:
+                sensor._i2c.writeBlock(sensor.address, CSS811_SW_RESET, _RESET_KEY)
+            except IOError:
+                return self._fail("Reset failed")
+            sensor.invalidate_meas_mode()
+            sensor.invalidate_device_info()
+
+            time.sleep(self.poll_interval)
+            if self._wait_status(0, _STATUS_FW_MODE) is None:
+                return self._fail("Sensor did not enter boot mode")
+
+            try:
+                sensor._i2c.writeBlock(sensor.address, CSS811_APP_ERASE, _ERASE_KEY)
+            except IOError:
+                return self._fail("Erase failed")
+
+            if self._wait_status(_STATUS_APP_ERASE) is None:
+                return self._fail("Timeout waiting for erase")
+
+        self._state = self.STATE_WRITE
+        total = len(image)
+        while self._offset < total:
+            if not self._write_chunk(image[self._offset:self._offset + _APP_DATA_CHUNK]):
+                return self._fail("Write failed at offset %d" % self._offset)
+
+            self._offset += _APP_DATA_CHUNK
+            if self.progress is not None:
+                self.progress(sensor, self._offset, total)
+            time.sleep(self.chunk_delay)
+
+        self._state = self.STATE_VERIFY
+        try:
+            sensor._i2c.writeCommand(sensor.address, CSS811_APP_VERIFY)
+        except IOError:
+            return self._fail("Verify failed")
+
+        status = self._wait_status(_STATUS_APP_VERIFY)
+        if status is None:
+            return self._fail("Timeout waiting for verify")
+        if status & _STATUS_ERROR or not status & _STATUS_APP_VALID:
+            return self._fail("Image did not verify")
+
+        self._state = self.STATE_DONE
+
+        if start_app:
+            return sensor.begin(timeout=self.timeout, poll_interval=self.poll_interval)
+
+        return sensor.SENSOR_SUCCESS
+
+def update_firmware(sensors, image, progress=None, **kwargs):
+    """
+        Update the firmware of several sensors. Sensors on different I2C buses
+        are updated in parallel, sensors on the same bus one after another.
+
+        :param sensors: The QwiicCcs811 objects to update
+        :param image: The firmware image, as bytes
+        :param progress: Called as progress(sensor, written, total) after each chunk
+        :param kwargs: Other Ccs811FirmwareUpdater parameters
+
+        :return: Dictionary of sensor to its Ccs811FirmwareUpdater, holding the
+                state and error of each update
+        :rtype: dict
+    """
+    buses = {}
+    updaters = {}
+    for sensor in sensors:
+        updater = Ccs811FirmwareUpdater(sensor, progress=progress, **kwargs)
+        updaters[sensor] = updater
+        buses.setdefault(id(sensor.get_i2c_driver()), []).append(updater)
+
+    def run_bus(bus):
+        for updater in bus:
+            try:
+                updater.update(image)
+            except Exception as err:  # pylint: disable=broad-except
+                updater._fail(str(err))
+
+    workers = [threading.Thread(target=run_bus, args=(bus,)) for bus in buses.values()]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    return updaters
+
+
+#======================================================================
+# Ccs811Group
+#
+# Poll a number of CCS811 sensors, spread over one or more I2C buses.
+#======================================================================
+class Ccs811Group(object):
+    """
+    Ccs811Group
+
+        Reads a set of QwiicCcs811 sensors on a schedule. Each I2C bus gets a
+        worker thread, so transactions on a bus are serialized while separate
+        buses run in parallel. Reads on a bus are staggered: each sensor is read
+        at its own offset after its result is ready, once per drive mode period.
+
+        :param callback: Called as callback(sensor, frame) for every new result.
+        :param error_callback: Called as error_callback(sensor, error) when a
+                        read fails or the callback raises an exception. If not
+                        provided, errors are ignored. Either way the other
+                        sensors keep being read.
+        :return: The group object.
+        :rtype: Object
+    """
+
+    # Retry delay, as a fraction of the sample period, after a failed read
+    _RETRY_FRACTION = 0.1
+
+    # Fraction of the period the read offsets are spread over. The rest is
+    # margin for sensor clocks running fast.
+    _STAGGER_SPAN = 0.5
+
+    # How often an idle (drive mode 0) sensor is checked for a mode change
+    _IDLE_CHECK = 1.0
+
+    def __init__(self, callback=None, error_callback=None):
+
+        self.callback = callback
+        self.error_callback = error_callback
+
+        self._buses = {}
+        self._threads = []
+        self._stop = threading.Event()
+
+    def add_sensor(self, sensor, bus=None):
+        """
+            Add a sensor to the group.
+
+            :param sensor: A QwiicCcs811 object, already started with begin()
+            :param bus: Key identifying the I2C bus of the sensor. If not
+                        provided, sensors sharing an i2c driver object share a bus.
+            :return: No return value
+
+        """
+        if self._threads:
+            raise RuntimeError("Sensors cannot be added while the group is running")
+
+        if bus is None:
+            bus = id(sensor.get_i2c_driver())
+
+        self._buses.setdefault(bus, []).append(sensor)
+
+    def get_sensors(self):
+        """
+            Return the sensors in the group, in the order they were added per bus.
+
+            :return: List of sensors
+            :rtype: list
+
+        """
+        return [sensor for sensors in self._buses.values() for sensor in sensors]
+
+    sensors = property(get_sensors)
+
+    def start(self):
+        """
+            Start one worker thread per I2C bus.
+
+            :return: No return value
+
+        """
+        if self._threads:
+            return
+
+        self._stop.clear()
+        for bus, sensors in self._buses.items():
+            worker = threading.Thread(target=self._run_bus, args=(sensors,),
+                                      name="Ccs811Group-%s" % (bus,))
+            worker.daemon = True
+            worker.start()
+            self._threads.append(worker)
+
+    def stop(self, timeout=None):
+        """
+            Stop the worker threads and wait for them to exit.
+
+            :param timeout: Seconds to wait for each worker
+            :return: No return value
+
+        """
+        self._stop.set()
+        for worker in self._threads:
+            worker.join(timeout)
+        self._threads = []
+
+    def is_running(self):
+        """
+            Return True if the worker threads are running.
+
+            :rtype: bool
+
+        """
+        return bool(self._threads)
+
+    running = property(is_running)
+
+    def iter_raw_batches(self, batch_size=16, max_batches=None):
+        """
+            Generator that streams raw samples from all sensors in the group, in
+            batches, putting each sensor in drive mode 4 (a raw sample every
+            250 ms) if it isn't already. The group runs for as long as the
+            generator does; the callback, if any, still gets every result.
+
+            Sensors on a bus are read on the group schedule, so each sample costs
+            one result frame read plus a few one byte status polls, as with
+            QwiicCcs811.iter_raw_batches().
+
+            :param batch_size: Number of samples in each batch
+            :param max_batches: Stop after this many batches, from all sensors.
+                        None to run forever.
+
+            :return: Yields (sensor, batch) tuples as the batch of a sensor fills
+            :rtype: tuple
+
+        """
+        if self._threads:
+            raise RuntimeError("The group is already running")
+
+        for sensor in self.get_sensors():
+            if sensor.get_drive_mode() != 4:
+                sensor.set_drive_mode(4)
+
+        full = Queue()
+        batches = {}
+        callback = self.callback
+
+        def collect(sensor, frame):
+
+            batch = batches.get(id(sensor))
+            if batch is None:
+                batch = batches[id(sensor)] = _new_raw_batch()
+
+            batch.append(_monotonic(), frame)
+            if len(batch) >= batch_size:
+                full.put((sensor, batch))
+                batches[id(sensor)] = _new_raw_batch()
+
+            if callback is not None:
+                callback(sensor, frame)
+
+        self.callback = collect
+        self.start()
+        try:
+            count = 0
+            while max_batches is None or count < max_batches:
+                yield full.get()
+                count += 1
+        finally:
+            self.stop()
+            self.callback = callback
+
+    def _report(self, sensor, error):
+
+        if self.error_callback is not None:
+            try:
+                self.error_callback(sensor, error)
+            except Exception:   # pylint: disable=broad-except
+                # a failing error callback must not stop the bus
+                pass
+
+    # Read a sensor if it has a new result. Returns True if a result was
+    # read, False if there was none and None if the read failed.
+    def _read_sensor(self, sensor):
+
+        try:
+            if not sensor._read_status() & _STATUS_DATA_READY:
+                return False
+            frame = sensor.read_frame()
+        except Exception as err:    # pylint: disable=broad-except
+            self._report(sensor, err)
+            return None
+
+        if not frame.data_ready:
+            return False
+
+        if self.callback is not None:
+            try:
+                self.callback(sensor, frame)
+            except Exception as err:    # pylint: disable=broad-except
+                self._report(sensor, err)
+        return True
+
+    def _run_bus(self, sensors):
+
+        # Schedule entries are (due time, index, polls, sensor). The index keeps
+        # the heap ordering stable and gives each sensor its offset in the
+        # stagger; polls counts the reads in a row that found no new data.
+        #
+        # Each sensor has a _SampleCadence that tracks when its results become
+        # ready, the same way iter_samples() does, and the sensor is read at its
+        # offset after that time. Until the ready time is known, and whenever the
+        # cadence pulls a read forward to measure it again, the sensor is polled
+        # every poll step until the result arrives.
+        count = len(sensors)
+        span = self._STAGGER_SPAN / count
+        cadences = [None] * count
+
+        now = _monotonic()
+        schedule = [(now, index, 0, sensor) for index, sensor in enumerate(sensors)]
+        heapq.heapify(schedule)
+
+        while not self._stop.is_set():
+
+            due, index, polls, sensor = heapq.heappop(schedule)
+
+            delay = due - _monotonic()
+            if delay > 0 and self._stop.wait(delay):
+                break
+
+            try:
+                period = sensor.get_sample_period()
+            except Exception as err:    # pylint: disable=broad-except
+                self._report(sensor, err)
+                cadences[index] = None
+                heapq.heappush(schedule, (_monotonic() + self._IDLE_CHECK, index, 0, sensor))
+                continue
+
+            if period is None:
+                cadences[index] = None
+                sensor.invalidate_meas_mode()
+                heapq.heappush(schedule, (due + self._IDLE_CHECK, index, 0, sensor))
+                continue
+
+            cadence = cadences[index]
+            if cadence is None or cadence.nominal != period:
+                cadence = cadences[index] = _SampleCadence(period, period * index * span)
+
+            result = self._read_sensor(sensor)
+            now = _monotonic()
+
+            if result:
+                cadence.found(now, polls)
+                polls = 0
+                due = cadence.next_read()
+                if due is None:
+                    due = now
+            elif result is None:
+                cadence.lost()
+                polls = 0
+                if sensor.get_circuit_state() == CIRCUIT_OPEN:
+                    # the error policy has given up on it for now - no quick retry
+                    due = now + period
+                else:
+                    due = now + period * self._RETRY_FRACTION
+            elif polls >= cadence.max_polls:
+                # no result for a while - check the drive mode on the sensor
+                cadence.lost()
+                sensor.invalidate_meas_mode()
+                polls = 0
+                due = now
+            else:
+                polls += 1
+                due = now + cadence.step
+
+            heapq.heappush(schedule, (due, index, polls, sensor))
@@ -0,0 +1,245 @@
+#-----------------------------------------------------------------------------
+# qwiic_ccs811_async.py
+#
+# asyncio support for the SparkFun qwiic CCS811 sensor.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+# This python library supports the SparkFun Electroncis qwiic
+# qwiic sensor/board ecosystem.
+#
+# More information on qwiic is at https:# www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+#
+# pylint: disable=line-too-long, invalid-name
+#
+
+"""
+qwiic_ccs811_async
+==================
+asyncio version of the qwiic_ccs811 driver. The blocking I2C calls run in an
+executor and all waits use asyncio.sleep(), so many sensors can share one event loop.
+
+This module requires Python 3.7 or later. The qwiic_ccs811 module itself is unchanged
+and can still be used on older versions of Python.
+
+"""
+
+import asyncio
+import threading
+import weakref
+
+import qwiic_ccs811
+
+# One asyncio lock per I2C driver object and event loop. Sensors that share a bus
+# must not interleave their transactions; the lock is taken before a call goes
+# to the executor, so waiting for a busy bus doesn't tie up an executor thread
+# that sensors on other buses could use.
+_busLocks = weakref.WeakKeyDictionary()
+_busLocksGuard = threading.Lock()
+
+def _get_bus_lock(i2c_driver):
+
+    loop = asyncio.get_running_loop()
+    with _busLocksGuard:
+        locks = _busLocks.setdefault(loop, {})
+        lock = locks.get(id(i2c_driver))
+        if lock is None:
+            lock = locks[id(i2c_driver)] = asyncio.Lock()
+        return lock
+
+
+class AsyncQwiicCcs811(object):
+    """
+    AsyncQwiicCcs811
+
+        :param address: The I2C address to use for the device.
+                        If not provided, the default address is used.
+        :param i2c_driver: An existing i2c driver object. If not provided
+                        a driver object is created.
+        :param executor: The concurrent.futures executor used for I2C calls.
+                        If not provided, the event loop default executor is used.
+        :return: The async Ccs811 device object.
+        :rtype: Object
+    """
+
+    # How often samples() checks an idle (drive mode 0) sensor for a mode change
+    _IDLE_CHECK = 1.0
+
+    def __init__(self, address=None, i2c_driver=None, executor=None):
+
+        self.sensor = qwiic_ccs811.QwiicCcs811(address, i2c_driver)
+        self._executor = executor
+        self._busLock = None    # found on the first call, see _call()
+
+    # Run a blocking call in the executor, holding the bus lock
+    async def _call(self, func, *args):
+
+        loop = asyncio.get_running_loop()
+        if self._busLock is None:
+            # Getting the driver may load qwiic_i2c and probe the platform, so
+            # it's done on first use, in the executor
+            driver = await loop.run_in_executor(self._executor, self.sensor.get_i2c_driver)
+            self._busLock = _get_bus_lock(driver)
+        async with self._busLock:
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    async def begin(self, warm=False, timeout=1.0, poll_interval=.01):
+        """
+            Initialize the operation of the Ccs811 module, without blocking the event loop.
+            See QwiicCcs811.begin() for the parameters.
+
+            :return: Returns SENSOR_SUCCESS on success, SENSOR_ID_ERROR on bad chip ID
+                or SENSOR_INTERNAL_ERROR.
+            :rtype: integer
+
+        """
+        steps = self.sensor._begin_steps(warm, timeout, poll_interval)
+        while True:
+            delay, result = await self._call(next, steps)
+            if delay is None:
+                return result
+            await asyncio.sleep(delay)
+
+    async def read_frame(self):
+        """
+            Read the complete ALG_RESULT_DATA block. See QwiicCcs811.read_frame()
+
+            :return: The decoded frame
+            :rtype: CCS811Frame
+
+        """
+        return await self._call(self.sensor.read_frame)
+
+    async def set_environmental_data(self, relativeHumidity, temperature):
+        """
+            Write humidity and temperature compensation data to the sensor.
+            See QwiicCcs811.set_environmental_data()
+
+            :param relativeHumidity: The relativity Humity for the sensor to use
+            :param temperature: The temperature for the sensor to use
+
+            :return: one of the SENSOR_ return codes.
+            :rtype: integer
+
+        """
+        return await self._call(self.sensor.set_environmental_data, relativeHumidity, temperature)
+
+    async def set_drive_mode(self, mode):
+        """
+            Set the Drive mode for the sensor. See QwiicCcs811.set_drive_mode()
+
+            :param mode: The drive mode, 0 - 4
+
+            :return: SENSOR_SUCCESS
+            :rtype: integer
+
+        """
+        return await self._call(self.sensor.set_drive_mode, mode)
+
+    async def samples(self):
+        """
+            Asynchronous iterator over new results from the sensor. Each result
+            is read once: the cadence of the sensor is learned as results arrive,
+            as in QwiicCcs811.iter_samples(), and the iterator sleeps until just
+            after the next result is expected.
+
+            Use as::
+
+                async for frame in sensor.samples():
+                    ...
+
+            :return: Yields CCS811Frame objects
+
+        """
+        loop = asyncio.get_running_loop()
+        cadence = None
+
+        while True:
+
+            period = await self._call(self.sensor.get_sample_period)
+            if period is None:
+                cadence = None
+                await asyncio.sleep(self._IDLE_CHECK)
+                self.sensor.invalidate_meas_mode()
+                continue
+
+            if cadence is None or cadence.nominal != period:
+                cadence = qwiic_ccs811._SampleCadence(period)
+
+            wake = cadence.next_read()
+            if wake is not None:
+                delay = wake - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            step = cadence.step
+            polls = 0
+            ready = await self._call(self.sensor._read_status) & qwiic_ccs811._STATUS_DATA_READY
+            while not ready and polls < cadence.max_polls:
+                polls += 1
+                await asyncio.sleep(step)
+                ready = await self._call(self.sensor._read_status) & qwiic_ccs811._STATUS_DATA_READY
+
+            if not ready:
+                cadence.lost()
+                self.sensor.invalidate_meas_mode()
+                continue
+
+            frame = await self.read_frame()
+            if not frame.data_ready:
+                continue
+
+            cadence.found(loop.time(), polls)
+            yield frame
+
+    #----------------------------------------------------
+    # Cached values - these don't touch the bus
+    def get_co2(self):
+        """
+            Return the last CO2 value read.
+
+            :return: The CO2 Value
+            :rtype: float
+
+        """
+        return self.sensor.CO2
+
+    CO2 = property(get_co2)
+
+    def get_tvoc(self):
+        """
+            Return the last TVOC value read.
+
+            :return: The TVOC Value
+            :rtype: float
+
+        """
+        return self.sensor.TVOC
+
+    TVOC = property(get_tvoc)
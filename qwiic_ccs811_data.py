@@ -0,0 +1,1091 @@
+#-----------------------------------------------------------------------------
+# qwiic_ccs811_data.py
+#
+# Sample storage and sharing for the SparkFun qwiic CCS811 sensor.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+# This python library supports the SparkFun Electroncis qwiic
+# qwiic sensor/board ecosystem.
+#
+# More information on qwiic is at https:# www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+#
+# pylint: disable=line-too-long, invalid-name, too-many-instance-attributes
+#
+
+"""
+qwiic_ccs811_data
+=================
+Fixed layout binary sample records, and a shared memory sample bus: one
+collector process owns the sensor and publishes each sample into a memory
+mapped ring buffer, and any number of other processes read from it without
+touching the I2C bus.
+
+    # collector process
+    bus = qwiic_ccs811_data.SampleBus('/dev/shm/ccs811')
+    bus.run(sensor)
+
+    # any other process
+    reader = qwiic_ccs811_data.SampleBusReader('/dev/shm/ccs811')
+    print(reader.latest().co2)
+
+"""
+from __future__ import print_function, division
+
+import os
+import mmap
+import time
+import struct
+from collections import namedtuple, deque
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import qwiic_ccs811
+
+#----------------------------------------------------
+# Sample records
+#
+# Every sample is stored as one 40 byte little endian record:
+#
+#   seq         uint64  sample number, starting at 1. 0 marks an empty slot
+#   monotonic   double  monotonic time the result was read
+#   wall        double  wall clock (time.time()) when the result was read
+#   co2         uint16  eCO2, ppm
+#   tvoc        uint16  TVOC, ppb
+#   address     uint8   I2C address of the sensor
+#   status      uint8   STATUS register
+#   error_id    uint8   ERROR_ID register
+#   current     uint8   sensor current, uA
+#   raw_adc     uint16  raw 10 bit ADC value of the sensor voltage
+#   ntc_vref    uint16  NTC counts across the reference resistor, 0 if not read
+#   ntc_vntc    uint16  NTC counts across the thermistor, 0 if not read
+#
+SAMPLE_RECORD = struct.Struct('<QddHHBBBBHHH2x')
+
+SAMPLE_FIELDS = ('seq', 'monotonic', 'wall', 'co2', 'tvoc', 'address', 'status',
+                 'error_id', 'current', 'raw_adc', 'ntc_vref', 'ntc_vntc')
+
+_SEQ = struct.Struct('<Q')
+
+class Sample(namedtuple('Sample', SAMPLE_FIELDS)):
+    """
+        One sample record. See SAMPLE_RECORD for the fields.
+    """
+    __slots__ = ()
+
+    @property
+    def frame(self):
+        """The sample as a CCS811Frame"""
+        return qwiic_ccs811.CCS811Frame(self.co2, self.tvoc, self.status, self.error_id,
+                                        self.current, self.raw_adc)
+
+def make_sample(sensor, frame, timestamp=None, wall=None, seq=0):
+    """
+        Build a Sample from a frame returned by sensor.read_frame(). The NTC
+        counts are taken from the last sensor.read_ntc(), if any.
+
+        :param sensor: The QwiicCcs811 the frame was read from
+        :param frame: The CCS811Frame
+        :param timestamp: Monotonic time of the read. Default is now
+        :param wall: Wall clock time of the read. Default is now
+        :param seq: Sample number
+        :return: The sample
+        :rtype: Sample
+    """
+    if timestamp is None:
+        timestamp = qwiic_ccs811._monotonic()
+    if wall is None:
+        wall = time.time()
+
+    return Sample(seq, timestamp, wall, frame.co2, frame.tvoc, sensor.address, frame.status,
+                  frame.error_id, frame.current, frame.raw_adc,
+                  getattr(sensor, 'vrefCounts', 0), getattr(sensor, 'ntcCounts', 0))
+
+def sample_dtype():
+    """
+        Return the numpy dtype matching SAMPLE_RECORD. Needs numpy.
+
+        :rtype: numpy.dtype
+    """
+    import numpy
+
+    return numpy.dtype({'names': SAMPLE_FIELDS,
+                        'formats': ['<u8', '<f8', '<f8', '<u2', '<u2', 'u1', 'u1', 'u1', 'u1',
+                                    '<u2', '<u2', '<u2'],
+                        'offsets': [0, 8, 16, 24, 26, 28, 29, 30, 31, 32, 34, 36],
+                        'itemsize': SAMPLE_RECORD.size})
+
+#----------------------------------------------------
+# Shared memory sample bus
+#
+# The file is a 64 byte header followed by <capacity> record slots:
+#
+#   magic       8s      b'CCS811SB'
+#   version     uint32
+#   record_size uint32
+#   capacity    uint32
+#   flags       uint32  _BUS_SUPERSEDED once a newer bus replaced this file
+#   head        uint64  number of samples published so far
+#   generation  uint64  random, new for every SampleBus
+#
+# There is a single writer and no locks. Sample n (from 1) goes in slot
+# (n - 1) % capacity. The writer clears the slot seq, writes the record, sets
+# the slot seq to n and then advances head. A reader takes a record only if the
+# slot seq is n both before and after copying it, so a record being overwritten
+# is never returned.
+#
+# A bus file is never resized or truncated while it may be mapped. A new
+# SampleBus builds its file under a temporary name, renames it over the old
+# one and then sets _BUS_SUPERSEDED in the old file, so readers know to map
+# the new one.
+_BUS_MAGIC = b'CCS811SB'
+_BUS_VERSION = 2
+_BUS_HEADER = struct.Struct('<8sIIII')
+_BUS_FLAGS = struct.Struct('<I')
+_BUS_FLAGS_OFFSET = 20
+_BUS_HEAD_OFFSET = 24
+_BUS_GENERATION_OFFSET = 32
+_BUS_DATA_OFFSET = 64
+_BUS_SUPERSEDED = 1
+
+def _open_bus_map(path, write=False):
+
+    with open(path, 'r+b' if write else 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if write else mmap.ACCESS_READ)
+
+    if len(mapped) >= _BUS_DATA_OFFSET:
+        magic, version, record_size, capacity, _ = _BUS_HEADER.unpack_from(mapped, 0)
+        if magic == _BUS_MAGIC and version == _BUS_VERSION and record_size == SAMPLE_RECORD.size and \
+                len(mapped) >= _BUS_DATA_OFFSET + capacity * record_size:
+            return mapped, capacity
+
+    mapped.close()
+    raise ValueError("%s is not a CCS811 sample bus" % path)
+
+class SampleBus(object):
+    """
+    SampleBus
+
+        Writer side of the shared memory sample bus. Only one SampleBus may be
+        open on a path at a time (where the platform supports file locks; the
+        lock is held on <path>.lock).
+
+        Put the file on a memory backed file system, such as /dev/shm, so
+        publishing never waits on storage.
+
+        :param path: Path of the bus file. A new file replaces any existing one;
+                        readers of the old one move to the new one.
+        :param capacity: Number of samples kept for readers.
+        :return: The SampleBus object.
+        :rtype: Object
+    """
+    def __init__(self, path, capacity=4096):
+
+        self.path = path
+        self.capacity = capacity
+
+        self._lock = None
+        if fcntl is not None:
+            self._lock = open(path + '.lock', 'a+b')
+            try:
+                fcntl.flock(self._lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except IOError:
+                self._lock.close()
+                raise IOError("Sample bus %s already has a writer" % path)
+
+        size = _BUS_DATA_OFFSET + capacity * SAMPLE_RECORD.size
+        self.generation = struct.unpack('<Q', os.urandom(8))[0]
+
+        temp = '%s.%d.tmp' % (path, os.getpid())
+        with open(temp, 'w+b') as f:
+            f.truncate(size)
+            self._map = mmap.mmap(f.fileno(), size)
+        _BUS_HEADER.pack_into(self._map, 0, _BUS_MAGIC, _BUS_VERSION, SAMPLE_RECORD.size, capacity, 0)
+        _SEQ.pack_into(self._map, _BUS_GENERATION_OFFSET, self.generation)
+
+        # the old bus, if any, is marked only once the new one is in place
+        try:
+            old, _ = _open_bus_map(path, write=True)
+        except (IOError, OSError, ValueError):
+            old = None
+
+        os.replace(temp, path)
+
+        if old is not None:
+            _BUS_FLAGS.pack_into(old, _BUS_FLAGS_OFFSET, _BUS_SUPERSEDED)
+            old.close()
+
+        self._head = 0
+
+    def close(self):
+        """
+            Close the bus. Readers can still read what was published.
+
+            :return: No return value
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            if self._lock is not None:
+                self._lock.close()
+                self._lock = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_head(self):
+        """
+            Return the number of samples published.
+
+            :rtype: integer
+        """
+        return self._head
+
+    head = property(get_head)
+
+    def publish(self, sample):
+        """
+            Publish a sample. Its seq field is replaced with the next sample number.
+
+            :param sample: The Sample
+            :return: The sample number
+            :rtype: integer
+        """
+        seq = self._head + 1
+        offset = _BUS_DATA_OFFSET + self._head % self.capacity * SAMPLE_RECORD.size
+
+        mm = self._map
+        _SEQ.pack_into(mm, offset, 0)
+        SAMPLE_RECORD.pack_into(mm, offset, 0, *sample[1:])
+        _SEQ.pack_into(mm, offset, seq)
+        _SEQ.pack_into(mm, _BUS_HEAD_OFFSET, seq)
+
+        self._head = seq
+        return seq
+
+    def publish_frame(self, sensor, frame, timestamp=None):
+        """
+            Publish a frame read from a sensor.
+
+            :param sensor: The QwiicCcs811 the frame was read from
+            :param frame: The CCS811Frame from sensor.read_frame()
+            :param timestamp: Monotonic time of the read. Default is now
+            :return: The sample number
+            :rtype: integer
+        """
+        return self.publish(make_sample(sensor, frame, timestamp))
+
+    def run(self, sensor, max_samples=None, read_ntc=False):
+        """
+            Collector loop: publish every new result from the sensor, using
+            sensor.iter_samples().
+
+            :param sensor: The QwiicCcs811. It should only be used by this loop.
+            :param max_samples: Stop after this many samples. None to run forever.
+            :param read_ntc: If True, read the NTC with each sample
+            :return: No return value
+        """
+        for timestamp, frame in sensor.iter_samples(max_samples):
+            if read_ntc:
+                sensor.read_ntc()
+            self.publish(make_sample(sensor, frame, timestamp))
+
+class SampleBusReader(object):
+    """
+    SampleBusReader
+
+        Reader side of the shared memory sample bus. Reads never block the
+        writer or the I2C bus.
+
+        :param path: Path of the bus file, as given to SampleBus
+        :return: The SampleBusReader object.
+        :rtype: Object
+    """
+    def __init__(self, path):
+
+        self.path = path
+        self.lost = 0
+        self._map = None
+        self._open()
+        self._cursorGeneration = self.generation
+
+    # Map the bus file, replacing the current mapping
+    def _open(self):
+
+        mapped, capacity = _open_bus_map(self.path)
+        self._release()
+        self._map = mapped
+        self.capacity = capacity
+        self.generation = _SEQ.unpack_from(mapped, _BUS_GENERATION_OFFSET)[0]
+
+    def _release(self):
+
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # a view is still exported - the map is released with it
+                pass
+            self._map = None
+
+    def close(self):
+        """
+            Close the reader. Views returned by records() or columns() can't be
+            used afterwards.
+
+            :return: No return value
+        """
+        self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_head(self):
+        """
+            Return the number of samples published so far. If a new collector
+            has replaced the bus, the reader moves to the new one first.
+
+            :rtype: integer
+        """
+        if _BUS_FLAGS.unpack_from(self._map, _BUS_FLAGS_OFFSET)[0] & _BUS_SUPERSEDED:
+            self._open()
+        return _SEQ.unpack_from(self._map, _BUS_HEAD_OFFSET)[0]
+
+    head = property(get_head)
+
+    def _read(self, seq):
+
+        offset = _BUS_DATA_OFFSET + (seq - 1) % self.capacity * SAMPLE_RECORD.size
+
+        mm = self._map
+        if _SEQ.unpack_from(mm, offset)[0] != seq:
+            return None
+        record = SAMPLE_RECORD.unpack_from(mm, offset)
+        if record[0] != seq or _SEQ.unpack_from(mm, offset)[0] != seq:
+            return None
+        return Sample(*record)
+
+    def latest(self):
+        """
+            Return the most recent sample.
+
+            :return: The sample, or None if nothing was published yet
+            :rtype: Sample
+        """
+        head = self.get_head()
+        while head > 0:
+            sample = self._read(head)
+            if sample is not None:
+                return sample
+            # overwritten while reading, take the newer one
+            head = self.get_head()
+        return None
+
+    def read(self, cursor=0):
+        """
+            Return the samples published after the cursor. If the reader fell
+            more than capacity samples behind, the missed samples are counted in
+            the lost attribute. If a new collector replaced the bus since the
+            last call, reading starts again from its oldest sample.
+
+            :param cursor: The cursor returned by the last call, 0 to start with
+                        the oldest sample still available
+            :return: (samples, cursor) tuple
+            :rtype: tuple
+        """
+        head = self.get_head()
+        if self.generation != self._cursorGeneration:
+            cursor = 0
+            self._cursorGeneration = self.generation
+        start = max(cursor, head - self.capacity)
+        if cursor and start > cursor:
+            self.lost += start - cursor
+
+        samples = []
+        for seq in range(start + 1, head + 1):
+            sample = self._read(seq)
+            if sample is None:
+                # overwritten while reading
+                self.lost += 1
+                continue
+            samples.append(sample)
+
+        return samples, head
+
+    def wait(self, cursor, timeout=None, poll_interval=.05):
+        """
+            Wait until a sample newer than the cursor is published.
+
+            :param cursor: The cursor from read(), or a head value
+            :param timeout: Seconds to wait, None to wait forever
+            :param poll_interval: Seconds between checks
+            :return: True if a new sample is available, or a new collector
+                    replaced the bus
+            :rtype: bool
+        """
+        deadline = None if timeout is None else qwiic_ccs811._monotonic() + timeout
+        while self.get_head() <= cursor and self.generation == self._cursorGeneration:
+            if deadline is not None:
+                remaining = deadline - qwiic_ccs811._monotonic()
+                if remaining <= 0:
+                    return False
+                time.sleep(min(poll_interval, remaining))
+            else:
+                time.sleep(poll_interval)
+        return True
+
+    def records(self):
+        """
+            Return a read only memoryview of the record slots, without copying.
+            Slots are in ring order; check the seq field of each record, since
+            the writer may overwrite a slot at any time.
+
+            :rtype: memoryview
+        """
+        self.get_head()
+        return memoryview(self._map)[_BUS_DATA_OFFSET:]
+
+    def columns(self):
+        """
+            Return a numpy structured array view of the record slots, without
+            copying. The same caveats as for records() apply. Needs numpy.
+
+            :rtype: numpy.ndarray
+        """
+        import numpy
+
+        self.get_head()
+        return numpy.frombuffer(self._map, dtype=sample_dtype(), count=self.capacity,
+                                offset=_BUS_DATA_OFFSET)
+
+#----------------------------------------------------
+# Recording files
+#
+# A recording is a 32 byte header followed by records, back to back:
+#
+#   magic       8s      b'CCS811RC'
+#   version     uint32
+#   record_size uint32
+#   created     double  wall clock time the file was created
+#   (reserved)  8 bytes
+#
+# Records are only ever appended. A partial record at the end of the file,
+# left by a crash mid write, is dropped when the file is opened for appending.
+_REC_MAGIC = b'CCS811RC'
+_REC_VERSION = 1
+_REC_HEADER = struct.Struct('<8sIId8x')
+
+def _check_recording_header(data, path, magic, record):
+
+    found, version, record_size, created = _REC_HEADER.unpack_from(data, 0)
+    if found != magic or version != _REC_VERSION or record_size != record.size:
+        raise ValueError("%s is not a CCS811 recording" % path)
+    return created
+
+class Recorder(object):
+    """
+    Recorder
+
+        Appends samples to a recording file. Records are packed into a buffer
+        and written in bulk when the buffer is full, or on the first append once
+        sync_interval has passed since the last sync, whichever comes first; the
+        file is then synced to storage. Samples not yet synced are lost on a
+        power failure, so size the buffer and sync interval for how much data
+        may be lost.
+
+        :param path: The recording file. If it exists, samples are appended.
+        :param buffer_records: Number of records buffered before a write.
+        :param sync_interval: Seconds between syncs to storage. None to only
+                        sync on close.
+        :return: The Recorder object.
+        :rtype: Object
+    """
+    # the file type: magic and record layout
+    _MAGIC = _REC_MAGIC
+    _RECORD = SAMPLE_RECORD
+
+    def __init__(self, path, buffer_records=64, sync_interval=60.):
+
+        self.path = path
+        self.buffer_records = buffer_records
+        self.sync_interval = sync_interval
+
+        self._file = open(path, 'a+b')
+        self._file.seek(0, os.SEEK_END)
+        size = self._file.tell()
+
+        if size < _REC_HEADER.size:
+            self._file.truncate(0)
+            self._file.write(_REC_HEADER.pack(self._MAGIC, _REC_VERSION, self._RECORD.size, time.time()))
+            self._file.flush()
+            size = _REC_HEADER.size
+            self._count = 0
+        else:
+            self._file.seek(0)
+            try:
+                _check_recording_header(self._file.read(_REC_HEADER.size), path, self._MAGIC, self._RECORD)
+            except ValueError:
+                self._file.close()
+                raise
+
+            self._count = (size - _REC_HEADER.size) // self._RECORD.size
+            whole = _REC_HEADER.size + self._count * self._RECORD.size
+            if whole != size:
+                self._file.truncate(whole)
+
+        self._buffer = bytearray(buffer_records * self._RECORD.size)
+        self._used = 0
+        self._lastSync = qwiic_ccs811._monotonic()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, sample):
+        """
+            Append a sample. Its seq field is replaced with the record number,
+            starting at 1.
+
+            :param sample: The Sample
+            :return: The record number
+            :rtype: integer
+        """
+        self._count += 1
+        self._pack(self._used * self._RECORD.size, sample)
+        self._used += 1
+
+        if self._used == self.buffer_records:
+            self.flush()
+        elif self.sync_interval is not None and \
+                qwiic_ccs811._monotonic() - self._lastSync >= self.sync_interval:
+            # slow sample rates don't fill the buffer - don't let it wait
+            self.sync()
+
+        return self._count
+
+    def _pack(self, offset, sample):
+        self._RECORD.pack_into(self._buffer, offset, self._count, *sample[1:])
+
+    def append_frame(self, sensor, frame, timestamp=None):
+        """
+            Append a frame read from a sensor.
+
+            :param sensor: The QwiicCcs811 the frame was read from
+            :param frame: The CCS811Frame from sensor.read_frame()
+            :param timestamp: Monotonic time of the read. Default is now
+            :return: The record number
+            :rtype: integer
+        """
+        return self.append(make_sample(sensor, frame, timestamp))
+
+    def flush(self):
+        """
+            Write buffered records to the file, and sync it if the sync interval
+            has passed.
+
+            :return: No return value
+        """
+        if self._used:
+            self._file.write(memoryview(self._buffer)[:self._used * self._RECORD.size])
+            self._used = 0
+            self._file.flush()
+
+        if self.sync_interval is not None and \
+                qwiic_ccs811._monotonic() - self._lastSync >= self.sync_interval:
+            self.sync()
+
+    def sync(self):
+        """
+            Write buffered records and sync the file to storage.
+
+            :return: No return value
+        """
+        if self._used:
+            self._file.write(memoryview(self._buffer)[:self._used * self._RECORD.size])
+            self._used = 0
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._lastSync = qwiic_ccs811._monotonic()
+
+    def close(self):
+        """
+            Sync and close the file.
+
+            :return: No return value
+        """
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class RecordingReader(object):
+    """
+    RecordingReader
+
+        Memory maps a recording file for fast queries. Records written after
+        the reader was opened are picked up by refresh().
+
+        :param path: The recording file
+        :return: The RecordingReader object.
+        :rtype: Object
+    """
+    # the file type: magic, record layout, record class, numpy dtype and the
+    # field time_range() searches
+    _MAGIC = _REC_MAGIC
+    _RECORD = SAMPLE_RECORD
+    _ITEM = Sample
+    _TIME_FIELD = 'wall'
+
+    @staticmethod
+    def _dtype():
+        return sample_dtype()
+
+    def __init__(self, path):
+
+        self.path = path
+        self._map = None
+        self.refresh()
+        self.created = _check_recording_header(self._map, path, self._MAGIC, self._RECORD)
+
+    def refresh(self):
+        """
+            Map the file again, to see records appended since it was opened.
+            Views from earlier calls stay on the old mapping.
+
+            :return: Number of records
+            :rtype: integer
+        """
+        with open(self.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.close()
+        self._map = mapped
+        self._count = (len(mapped) - _REC_HEADER.size) // self._RECORD.size
+        return self._count
+
+    def close(self):
+        """
+            Close the reader.
+
+            :return: No return value
+        """
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # a view is still exported - the map is released with it
+                pass
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("record index out of range")
+        return self._ITEM(*self._RECORD.unpack_from(self._map, _REC_HEADER.size + index * self._RECORD.size))
+
+    def __iter__(self):
+
+        for index in range(self._count):
+            yield self[index]
+
+    def records(self):
+        """
+            Return a read only memoryview of the records, without copying.
+
+            :rtype: memoryview
+        """
+        return memoryview(self._map)[_REC_HEADER.size:_REC_HEADER.size + self._count * self._RECORD.size]
+
+    def columns(self):
+        """
+            Return a numpy structured array view of the records, without copying.
+            A column is columns()['co2']. Needs numpy.
+
+            :rtype: numpy.ndarray
+        """
+        import numpy
+
+        return numpy.frombuffer(self._map, dtype=self._dtype(), count=self._count,
+                                offset=_REC_HEADER.size)
+
+    def column(self, name):
+        """
+            Return one field of every record as a numpy view. Needs numpy.
+
+            :param name: A field name from SAMPLE_FIELDS
+            :rtype: numpy.ndarray
+        """
+        return self.columns()[name]
+
+    def time_range(self, start=None, end=None):
+        """
+            Return the records with a wall clock time in [start, end), as a numpy
+            view. Records are found by binary search, so the file must be in time
+            order, as written by Recorder. Needs numpy.
+
+            :param start: Start time, from time.time(). None for the first record
+            :param end: End time. None for the last record
+            :rtype: numpy.ndarray
+        """
+        columns = self.columns()
+        times = columns[self._TIME_FIELD]
+        first = 0 if start is None else times.searchsorted(start, 'left')
+        last = len(times) if end is None else times.searchsorted(end, 'left')
+        return columns[first:last]
+
+#----------------------------------------------------
+# Aggregation
+#
+# Closed buckets are stored as one 40 byte little endian record:
+#
+#   start       double  wall clock time the bucket starts
+#   resolution  uint32  bucket length, seconds
+#   count       uint32  number of samples
+#   errors      uint32  number of samples with an error, and failed reads
+#   co2_min, co2_max            uint16
+#   co2_mean                    float32
+#   co2_last, tvoc_min, tvoc_max uint16
+#   tvoc_mean                   float32
+#   tvoc_last                   uint16
+#
+# The value fields are 0 in a bucket with only errors.
+AGGREGATE_RECORD = struct.Struct('<dIIIHHfHHHfH')
+
+AGGREGATE_FIELDS = ('start', 'resolution', 'count', 'errors', 'co2_min', 'co2_max', 'co2_mean',
+                    'co2_last', 'tvoc_min', 'tvoc_max', 'tvoc_mean', 'tvoc_last')
+
+class Aggregate(namedtuple('Aggregate', AGGREGATE_FIELDS)):
+    """
+        Summary of the samples in one time bucket. See AGGREGATE_RECORD for
+        the fields.
+    """
+    __slots__ = ()
+
+def aggregate_dtype():
+    """
+        Return the numpy dtype matching AGGREGATE_RECORD. Needs numpy.
+
+        :rtype: numpy.dtype
+    """
+    import numpy
+
+    return numpy.dtype({'names': AGGREGATE_FIELDS,
+                        'formats': ['<f8', '<u4', '<u4', '<u4', '<u2', '<u2', '<f4', '<u2',
+                                    '<u2', '<u2', '<f4', '<u2'],
+                        'offsets': [0, 8, 12, 16, 20, 22, 24, 28, 30, 32, 34, 38],
+                        'itemsize': AGGREGATE_RECORD.size})
+
+class _Bucket(object):
+
+    __slots__ = ('resolution', 'start', 'count', 'errors', 'co2_min', 'co2_max', 'co2_sum',
+                 'co2_last', 'tvoc_min', 'tvoc_max', 'tvoc_sum', 'tvoc_last')
+
+    def __init__(self, resolution):
+
+        self.resolution = resolution
+        self.start = None
+
+    def open(self, start):
+
+        self.start = start
+        self.count = 0
+        self.errors = 0
+        self.co2_sum = self.tvoc_sum = 0
+        self.co2_min = self.co2_max = self.co2_last = 0
+        self.tvoc_min = self.tvoc_max = self.tvoc_last = 0
+
+    def add(self, co2, tvoc):
+
+        if self.count:
+            if co2 < self.co2_min:
+                self.co2_min = co2
+            elif co2 > self.co2_max:
+                self.co2_max = co2
+            if tvoc < self.tvoc_min:
+                self.tvoc_min = tvoc
+            elif tvoc > self.tvoc_max:
+                self.tvoc_max = tvoc
+        else:
+            self.co2_min = self.co2_max = co2
+            self.tvoc_min = self.tvoc_max = tvoc
+
+        self.count += 1
+        self.co2_sum += co2
+        self.tvoc_sum += tvoc
+        self.co2_last = co2
+        self.tvoc_last = tvoc
+
+    def summary(self):
+
+        count = self.count
+        return Aggregate(self.start, self.resolution, count, self.errors,
+                         self.co2_min, self.co2_max, self.co2_sum / count if count else 0., self.co2_last,
+                         self.tvoc_min, self.tvoc_max, self.tvoc_sum / count if count else 0., self.tvoc_last)
+
+class Aggregator(object):
+    """
+    Aggregator
+
+        Keeps count, min, max, mean and last of CO2 and TVOC, and an error count,
+        in time buckets at several resolutions. Each sample updates one open
+        bucket per resolution, so the cost per sample is constant and memory is
+        bounded. When a bucket closes it's passed to the callback, and the
+        latest closed buckets are kept for queries.
+
+        Buckets are aligned on wall clock time, so a 3600 second bucket covers
+        a clock hour (UTC).
+
+            aggregator = Aggregator(callback=AggregateRecorder('co2.agg').append)
+            for timestamp, frame in sensor.iter_samples():
+                aggregator.add_frame(frame)
+
+        :param resolutions: Bucket lengths in seconds
+        :param callback: Function called with each closed Aggregate
+        :param keep: Number of closed buckets kept per resolution
+        :return: The Aggregator object.
+        :rtype: Object
+    """
+    def __init__(self, resolutions=(60, 3600, 86400), callback=None, keep=60):
+
+        self.callback = callback
+        self._buckets = [_Bucket(resolution) for resolution in sorted(resolutions)]
+        self._closed = dict((resolution, deque(maxlen=keep)) for resolution in resolutions)
+
+    def get_resolutions(self):
+        """
+            Return the bucket lengths, shortest first.
+
+            :rtype: list
+        """
+        return [bucket.resolution for bucket in self._buckets]
+
+    resolutions = property(get_resolutions)
+
+    def _bucket_for(self, bucket, wall):
+
+        start = wall - wall % bucket.resolution
+        if bucket.start != start:
+            if bucket.start is not None:
+                self._emit(bucket)
+            bucket.open(start)
+        return bucket
+
+    def _emit(self, bucket):
+
+        summary = bucket.summary()
+        self._closed[bucket.resolution].append(summary)
+        if self.callback is not None:
+            self.callback(summary)
+
+    def add(self, co2, tvoc, error=False, wall=None):
+        """
+            Add a reading.
+
+            :param co2: eCO2, ppm
+            :param tvoc: TVOC, ppb
+            :param error: True to also count an error
+            :param wall: Wall clock time of the reading. Default is now
+            :return: No return value
+        """
+        if wall is None:
+            wall = time.time()
+
+        for bucket in self._buckets:
+            bucket = self._bucket_for(bucket, wall)
+            bucket.add(co2, tvoc)
+            if error:
+                bucket.errors += 1
+
+    def add_error(self, wall=None):
+        """
+            Count a failed read.
+
+            :param wall: Wall clock time of the failure. Default is now
+            :return: No return value
+        """
+        if wall is None:
+            wall = time.time()
+
+        for bucket in self._buckets:
+            self._bucket_for(bucket, wall).errors += 1
+
+    def add_frame(self, frame, wall=None):
+        """
+            Add a CCS811Frame. Frames without new data are ignored; frames with
+            an error are counted as errors.
+
+            :param frame: The CCS811Frame from read_frame()
+            :param wall: Wall clock time of the read. Default is now
+            :return: No return value
+        """
+        if frame.error:
+            self.add_error(wall)
+        elif frame.data_ready:
+            self.add(frame.co2, frame.tvoc, False, wall)
+
+    def add_sample(self, sample):
+        """
+            Add a Sample, as from SampleBusReader or RecordingReader.
+
+            :param sample: The Sample
+            :return: No return value
+        """
+        self.add_frame(sample.frame, sample.wall)
+
+    def flush(self, wall=None):
+        """
+            Close the buckets that ended before the given time, without waiting
+            for a later sample. Call this periodically if samples may stop.
+
+            :param wall: Wall clock time. Default is now
+            :return: No return value
+        """
+        if wall is None:
+            wall = time.time()
+
+        for bucket in self._buckets:
+            if bucket.start is not None and bucket.start + bucket.resolution <= wall:
+                self._emit(bucket)
+                bucket.start = None
+
+    def current(self, resolution):
+        """
+            Return the open bucket at a resolution.
+
+            :param resolution: The bucket length
+            :return: The bucket so far, or None if no sample or error has been
+                    added since the last bucket closed. A bucket with only
+                    errors has a count of 0.
+            :rtype: Aggregate
+        """
+        for bucket in self._buckets:
+            if bucket.resolution == resolution:
+                return bucket.summary() if bucket.start is not None else None
+        raise ValueError("No %s second buckets" % resolution)
+
+    def closed(self, resolution):
+        """
+            Return the latest closed buckets at a resolution, oldest first.
+
+            :param resolution: The bucket length
+            :rtype: list
+        """
+        return list(self._closed[resolution])
+
+class AggregateRecorder(Recorder):
+    """
+    AggregateRecorder
+
+        Appends closed buckets from an Aggregator to a file. Use its append
+        method as the Aggregator callback. Same parameters as Recorder.
+    """
+    _MAGIC = b'CCS811AG'
+    _RECORD = AGGREGATE_RECORD
+
+    def _pack(self, offset, aggregate):
+        self._RECORD.pack_into(self._buffer, offset, *aggregate)
+
+    def append_frame(self, sensor, frame, timestamp=None):
+        """
+            Not supported - frames go to an Aggregator, which passes closed
+            buckets to append().
+        """
+        raise TypeError("AggregateRecorder stores Aggregate records, use append()")
+
+class AggregateReader(RecordingReader):
+    """
+    AggregateReader
+
+        Memory maps a file written by AggregateRecorder. Records are Aggregate
+        objects. The buckets of all resolutions are in one file, in the order
+        they closed, so time_range() needs the resolution to search.
+    """
+    _MAGIC = b'CCS811AG'
+    _RECORD = AGGREGATE_RECORD
+    _ITEM = Aggregate
+    _TIME_FIELD = 'start'
+
+    @staticmethod
+    def _dtype():
+        return aggregate_dtype()
+
+    def resolution(self, resolution):
+        """
+            Return the buckets of one resolution, in time order, as a numpy array.
+            Needs numpy.
+
+            :param resolution: The bucket length
+            :rtype: numpy.ndarray
+        """
+        columns = self.columns()
+        return columns[columns['resolution'] == resolution]
+
+    def time_range(self, start=None, end=None, resolution=None):
+        """
+            Return the buckets of one resolution starting in [start, end), as a
+            numpy array. Needs numpy.
+
+            :param start: Start time, from time.time(). None for the first bucket
+            :param end: End time. None for the last bucket
+            :param resolution: The bucket length
+            :rtype: numpy.ndarray
+        """
+        if resolution is None:
+            raise ValueError("time_range() needs a resolution - buckets of different resolutions aren't in time order")
+
+        buckets = self.resolution(resolution)
+        starts = buckets['start']
+        first = 0 if start is None else starts.searchsorted(start, 'left')
+        last = len(starts) if end is None else starts.searchsorted(end, 'left')
+        return buckets[first:last]
@@ -0,0 +1,333 @@
+#-----------------------------------------------------------------------------
+# qwiic_ccs811_exporter.py
+#
+# OpenMetrics exporter for the SparkFun qwiic CCS811 sensor.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+# This python library supports the SparkFun Electroncis qwiic
+# qwiic sensor/board ecosystem.
+#
+# More information on qwiic is at https:# www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+#
+# pylint: disable=line-too-long, invalid-name, too-many-instance-attributes
+#
+
+"""
+qwiic_ccs811_exporter
+=====================
+A small HTTP endpoint serving the latest CCS811 reading in the OpenMetrics text
+format, for Prometheus style scrapers. Scrapes never touch the I2C bus: the
+response is rendered once per new sample and the same bytes are served to every
+scraper.
+
+    exporter = qwiic_ccs811_exporter.MetricsExporter(sensor, port=9811)
+    exporter.start()
+    for timestamp, frame in sensor.iter_samples():
+        exporter.update(frame)
+
+"""
+from __future__ import print_function, division
+
+import time
+import threading
+
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+
+import qwiic_ccs811
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# ERROR_ID bits, in bit order
+_ERROR_NAMES = ('msg_invalid', 'read_reg_invalid', 'measmode_invalid', 'max_resistance',
+                'heater_fault', 'heater_supply')
+
+_EMPTY_PAYLOAD = b'# EOF\n'
+
+def _labels(pairs):
+
+    if not pairs:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"')
+                                          .replace('\n', '\\n'))
+                             for name, value in pairs)
+
+class _MetricsWriter(object):
+
+    def __init__(self, labels):
+
+        self._labels = sorted(labels.items())
+        self._lines = []
+
+    def family(self, name, kind, text):
+
+        self._lines.append('# TYPE %s %s' % (name, kind))
+        self._lines.append('# HELP %s %s' % (name, text))
+
+    def sample(self, name, value, labels=()):
+
+        if isinstance(value, float):
+            value = repr(value)
+        self._lines.append('%s%s %s' % (name, _labels(self._labels + list(labels)), value))
+
+    def render(self):
+
+        self._lines.append('# EOF\n')
+        return '\n'.join(self._lines).encode('utf-8')
+
+def render_metrics(frame, timestamp=None, baseline=None, stats=None, error_state=None,
+                   samples=0, labels=None):
+    """
+        Render a reading as OpenMetrics text.
+
+        :param frame: The CCS811Frame
+        :param timestamp: Wall clock time of the reading
+        :param baseline: The baseline, or None to leave it out
+        :param stats: The result of QwiicCcs811.stats(), or None
+        :param error_state: The result of QwiicCcs811.error_state(), or None
+        :param samples: Number of samples so far
+        :param labels: Dict of labels added to every metric
+        :return: The response body
+        :rtype: bytes
+    """
+    out = _MetricsWriter(labels or {})
+
+    out.family('ccs811_co2_ppm', 'gauge', 'Equivalent CO2 in ppm.')
+    out.sample('ccs811_co2_ppm', frame.co2)
+    out.family('ccs811_tvoc_ppb', 'gauge', 'Total volatile organic compounds in ppb.')
+    out.sample('ccs811_tvoc_ppb', frame.tvoc)
+    out.family('ccs811_status', 'gauge', 'STATUS register at the last reading.')
+    out.sample('ccs811_status', frame.status)
+    out.family('ccs811_error', 'gauge', 'ERROR bit of the STATUS register.')
+    out.sample('ccs811_error', 1 if frame.error else 0)
+    out.family('ccs811_error_id', 'gauge', 'ERROR_ID register bits.')
+    for bit, name in enumerate(_ERROR_NAMES):
+        out.sample('ccs811_error_id', frame.error_id >> bit & 1, [('error', name)])
+
+    if baseline is not None:
+        out.family('ccs811_baseline', 'gauge', 'BASELINE register.')
+        out.sample('ccs811_baseline', baseline)
+
+    if timestamp is not None:
+        out.family('ccs811_sample_timestamp_seconds', 'gauge', 'Time of the last reading.')
+        out.sample('ccs811_sample_timestamp_seconds', float(timestamp))
+
+    out.family('ccs811_samples', 'counter', 'Readings taken.')
+    out.sample('ccs811_samples_total', samples)
+
+    if stats is not None and stats['registers']:
+        registers = sorted(stats['registers'].items())
+        for field, kind, text in (('transactions', 'counter', 'I2C transactions.'),
+                                  ('errors', 'counter', 'I2C transactions that failed.'),
+                                  ('bytes_read', 'counter', 'Bytes read over I2C.'),
+                                  ('bytes_written', 'counter', 'Bytes written over I2C.'),
+                                  ('total_time', 'counter', 'Seconds spent in I2C transactions.')):
+            name = 'ccs811_i2c_%s' % field
+            if field == 'total_time':
+                name = 'ccs811_i2c_seconds'
+            out.family(name, kind, text)
+            for register, values in registers:
+                out.sample(name + '_total', values[field], [('register', register)])
+
+    if stats is not None and stats['swallowed_errors']:
+        out.family('ccs811_swallowed_errors', 'counter', 'I2C errors turned into a return value.')
+        for method, count in sorted(stats['swallowed_errors'].items()):
+            out.sample('ccs811_swallowed_errors_total', count, [('method', method)])
+
+    if error_state is not None:
+        out.family('ccs811_circuit_open', 'gauge', 'The error policy has stopped using the sensor.')
+        out.sample('ccs811_circuit_open', 0 if error_state['state'] == qwiic_ccs811.CIRCUIT_CLOSED else 1)
+        out.family('ccs811_i2c_failures', 'counter', 'I2C transactions that failed after retries.')
+        out.sample('ccs811_i2c_failures_total', error_state['total_failures'])
+        out.family('ccs811_i2c_retries', 'counter', 'I2C transactions retried.')
+        out.sample('ccs811_i2c_retries_total', error_state['retried'])
+
+    return out.render()
+
+class _Server(ThreadingMixIn, HTTPServer):
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+
+        payload = self.server.exporter._payload
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        # scrapes are frequent - don't log each one
+        pass
+
+class MetricsExporter(object):
+    """
+    MetricsExporter
+
+        Serves the latest reading at http://<address>:<port>/metrics. Call
+        update() with each new reading; scrapes only send the bytes rendered by
+        the last update().
+
+        :param sensor: The QwiicCcs811 the readings come from, for the baseline,
+                        bus statistics and error policy state. None if readings
+                        come from elsewhere, such as a SampleBusReader.
+        :param port: TCP port to listen on
+        :param address: Address to listen on. The default only accepts local
+                        connections.
+        :param labels: Dict of labels added to every metric
+        :param baseline_interval: Seconds between baseline reads. The baseline
+                        changes slowly, so it isn't read with every sample.
+                        None to leave the baseline out.
+        :return: The MetricsExporter object.
+        :rtype: Object
+    """
+    def __init__(self, sensor=None, port=9811, address='127.0.0.1', labels=None, baseline_interval=60.):
+
+        self.sensor = sensor
+        self.port = port
+        self.address = address
+        self.labels = dict(labels or {})
+        self.baseline_interval = baseline_interval
+
+        self.samples = 0
+        self._baseline = None
+        self._baselineRead = None
+        self._payload = _EMPTY_PAYLOAD
+        self._server = None
+        self._thread = None
+
+        if sensor is not None:
+            self.labels.setdefault('address', '0x%.2X' % sensor.address)
+
+    def get_payload(self):
+        """
+            Return the response body that scrapes get now.
+
+            :rtype: bytes
+        """
+        return self._payload
+
+    payload = property(get_payload)
+
+    def update(self, frame, timestamp=None):
+        """
+            Render a new reading. Frames without new data are skipped.
+
+            :param frame: The CCS811Frame from read_frame()
+            :param timestamp: Wall clock time of the reading. Default is now
+            :return: No return value
+        """
+        if not frame.data_ready and not frame.error:
+            return
+
+        if timestamp is None:
+            timestamp = time.time()
+
+        self.samples += 1
+        sensor = self.sensor
+        stats = error_state = None
+
+        if sensor is not None:
+            if self.baseline_interval is not None:
+                now = qwiic_ccs811._monotonic()
+                if self._baselineRead is None or now - self._baselineRead >= self.baseline_interval:
+                    self._baseline = sensor.get_baseline()
+                    self._baselineRead = now
+            stats = sensor.stats()
+            error_state = sensor.error_state()
+
+        # one reference swap, so a scrape gets either the old or the new payload
+        self._payload = render_metrics(frame, timestamp, self._baseline, stats, error_state,
+                                       self.samples, self.labels)
+
+    def update_sample(self, sample):
+        """
+            Render a new reading from a Sample, as from SampleBusReader.
+
+            :param sample: The Sample
+            :return: No return value
+        """
+        self.update(sample.frame, sample.wall)
+
+    def start(self):
+        """
+            Start serving, on a background thread.
+
+            :return: No return value
+        """
+        if self._server is not None:
+            return
+
+        self._server = _Server((self.address, self.port), _Handler)
+        self._server.exporter = self
+        self.port = self._server.server_address[1]
+
+        self._thread = threading.Thread(target=self._server.serve_forever, name='ccs811-exporter')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+            Stop serving.
+
+            :return: No return value
+        """
+        if self._server is None:
+            return
+
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
+
+    def run(self, max_samples=None):
+        """
+            Serve, and update with every new result from the sensor using
+            sensor.iter_samples().
+
+            :param max_samples: Stop after this many samples. None to run forever.
+            :return: No return value
+        """
+        self.start()
+        for timestamp, frame in self.sensor.iter_samples(max_samples):
+            self.update(frame)
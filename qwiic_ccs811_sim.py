@@ -0,0 +1,1041 @@
+#-----------------------------------------------------------------------------
+# qwiic_ccs811_sim.py
+#
+# Simulated SparkFun qwiic CCS811 sensor, for testing without hardware.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+# This python library supports the SparkFun Electroncis qwiic
+# qwiic sensor/board ecosystem.
+#
+# More information on qwiic is at https:# www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+#
+# pylint: disable=line-too-long, invalid-name, too-many-instance-attributes
+#
+
+"""
+qwiic_ccs811_sim
+================
+A register level model of the CCS811, usable as the i2c_driver of a QwiicCcs811
+object. It models the register map, the boot to application state machine, drive
+mode timing and the nINT pin, and can inject I/O errors and device errors.
+
+    sensor = qwiic_ccs811.QwiicCcs811(i2c_driver=qwiic_ccs811_sim.Ccs811Emulator())
+
+CaptureDriver records the I2C traffic of a real (or emulated) device to a file,
+and ReplayDriver plays it back to a QwiicCcs811 object.
+
+"""
+from __future__ import print_function, division
+
+import time
+import struct
+import threading
+from collections import namedtuple
+
+import qwiic_ccs811
+from qwiic_ccs811 import CSS811_STATUS, CSS811_MEAS_MODE, CSS811_ALG_RESULT_DATA, \
+    CSS811_RAW_DATA, CSS811_ENV_DATA, CSS811_NTC, CSS811_BASELINE, CSS811_HW_ID, \
+    CSS811_HW_VERSION, CSS811_FW_BOOT_VERSION, CSS811_FW_APP_VERSION, CSS811_ERROR_ID, \
+    CSS811_APP_START, CSS811_SW_RESET, CSS811_THRESHOLDS, CSS811_APP_ERASE, \
+    CSS811_APP_DATA, CSS811_APP_VERIFY
+
+# ERROR_ID bits
+ERROR_MSG_INVALID       = 1 << 0
+ERROR_READ_REG_INVALID  = 1 << 1
+ERROR_MEASMODE_INVALID  = 1 << 2
+ERROR_MAX_RESISTANCE    = 1 << 3
+ERROR_HEATER_FAULT      = 1 << 4
+ERROR_HEATER_SUPPLY     = 1 << 5
+
+_RESET_KEY = [0x11, 0xE5, 0x72, 0x8A]
+_ERASE_KEY = [0xE7, 0xA7, 0xE6, 0x09]
+
+_DRIVE_MODE_PERIODS = {1: 1.0, 2: 10.0, 3: 60.0, 4: 0.25}
+
+#----------------------------------------------------
+# Clocks
+class VirtualClock(object):
+    """
+        A clock that only moves when told to. Use with Ccs811Emulator to run
+        drive mode timing faster than real time.
+
+        :param start: The starting time, in seconds
+    """
+    def __init__(self, start=0.):
+
+        self._now = start
+        self._lock = threading.Lock()
+
+    def time(self):
+        """
+            Return the current virtual time.
+
+            :rtype: float
+        """
+        return self._now
+
+    def sleep(self, seconds):
+        """
+            Advance the virtual time.
+
+            :param seconds: Seconds to advance
+            :return: No return value
+        """
+        if seconds > 0:
+            with self._lock:
+                self._now += seconds
+
+    advance = sleep
+
+class _RealClock(object):
+
+    def time(self):
+        return qwiic_ccs811._monotonic()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+#----------------------------------------------------
+# The emulated device
+class Ccs811Emulator(object):
+    """
+    Ccs811Emulator
+
+        Simulated CCS811 that implements the qwiic_i2c driver methods used by
+        QwiicCcs811.
+
+        :param address: The I2C address the device answers on.
+        :param clock: Clock object with time() and sleep() methods. If not
+                        provided, the system monotonic clock is used.
+        :param app_valid: If False, the device has no valid application firmware
+                        and stays in boot mode.
+        :param clock_error: Fractional error of the device clock. 0.01 makes results
+                        arrive 1% slower than the nominal drive mode period.
+        :param boot_time: Seconds after power on or reset during which the device
+                        doesn't respond.
+        :return: The emulator object.
+        :rtype: Object
+    """
+
+    hw_id = 0x81
+    hw_version = 0x12
+    fw_boot_version = (0x10, 0x00)
+    fw_app_version = (0x20, 0x00)
+
+    # boot loader timing, in seconds
+    erase_time = 0.3
+    verify_time = 0.07
+
+    def __init__(self, address=None, clock=None, app_valid=True, clock_error=0., boot_time=0.):
+
+        self.address = address if address is not None else qwiic_ccs811._AVAILABLE_I2C_ADDRESS[0]
+        self.clock = clock if clock is not None else _RealClock()
+        self.app_valid = app_valid
+        self.clock_error = clock_error
+        self.boot_time = boot_time
+
+        # values reported by the sensor, see set_air(), set_raw() and set_ntc()
+        self.co2 = 400
+        self.tvoc = 0
+        self.raw_current = 20
+        self.raw_adc = 500
+        self.vref_counts = 20000
+        self.ntc_counts = 20000
+        self.air_source = None
+
+        # application flash, written through the boot loader. image_validator is
+        # called with the flash contents by APP_VERIFY and returns True if valid.
+        self.flash = bytearray()
+        self.image_validator = None
+
+        # injected faults
+        self._failCount = 0
+        self._failRegister = None
+        self._heldErrors = 0
+
+        # bus statistics
+        self.transactions = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.missed_results = 0
+
+        self._lock = threading.RLock()
+        self._resultEvent = threading.Condition(self._lock)
+        self.power_on()
+
+    #----------------------------------------------------
+    # Device state
+    def power_on(self):
+        """
+            Put the device in its power on state: boot mode, idle, no errors.
+
+            :return: No return value
+        """
+        with self._lock:
+            self.app_mode = False
+            self.meas_mode = 0
+            self.error_id = 0
+            self.env_data = [0x64, 0x00, 0x64, 0x00]
+            self.baseline = [0x00, 0x00]
+            self.thresholds = (qwiic_ccs811._DEFAULT_LOW_MED, qwiic_ccs811._DEFAULT_MED_HIGH,
+                               qwiic_ccs811._DEFAULT_HYSTERESIS)
+            self._band = None
+            self._bandChanged = False
+            self._resultCo2 = 0
+            self._resultTvoc = 0
+            self._resultRaw = [0, 0]
+            self._dataReady = False
+            self._modeStart = None
+            self._results = 0
+            self._bootUntil = self.clock.time() + self.boot_time
+            self._eraseDoneAt = None
+            self._verifyDoneAt = None
+
+    def set_air(self, co2, tvoc):
+        """
+            Set the eCO2 (ppm) and TVOC (ppb) values of the next results.
+
+            :return: No return value
+        """
+        self.co2 = co2
+        self.tvoc = tvoc
+
+    def set_raw(self, current, adc):
+        """
+            Set the sensor current (uA, 0 - 63) and ADC value (0 - 1023) of the next results.
+
+            :return: No return value
+        """
+        self.raw_current = current
+        self.raw_adc = adc
+
+    def set_ntc(self, vref_counts, ntc_counts):
+        """
+            Set the values returned by the NTC register.
+
+            :return: No return value
+        """
+        self.vref_counts = vref_counts
+        self.ntc_counts = ntc_counts
+
+    def get_status(self):
+        """
+            Return the current value of the STATUS register.
+
+            :rtype: integer
+        """
+        with self._lock:
+            self._update()
+            return self._status()
+
+    status = property(get_status)
+
+    def get_nint(self):
+        """
+            Return True if the nINT pin is asserted (driven low).
+
+            :rtype: bool
+        """
+        with self._lock:
+            self._update()
+            return self._interrupt()
+
+    nint = property(get_nint)
+
+    def next_result_time(self):
+        """
+            Return the clock time of the next result, or None in idle mode.
+
+            :rtype: float
+        """
+        with self._lock:
+            period = self._period()
+            if period is None:
+                return None
+            return self._modeStart + (self._results + 1) * period
+
+    #----------------------------------------------------
+    # Fault injection
+    def fail_next(self, count=1, register=None):
+        """
+            Make the next transactions fail with an IOError, as if the device
+            didn't acknowledge.
+
+            :param count: Number of transactions to fail, None to fail until cleared
+                        with fail_next(0)
+            :param register: Only fail transactions on this register
+            :return: No return value
+        """
+        self._failCount = -1 if count is None else count
+        self._failRegister = register
+
+    def set_error(self, error_bits):
+        """
+            Raise device errors, as reported by ERROR_ID. Errors raised this way
+            stay set, like a hardware fault, until cleared with set_error(0).
+
+            :param error_bits: The ERROR_ bits to raise
+            :return: No return value
+        """
+        with self._lock:
+            self._heldErrors = error_bits
+            self.error_id |= error_bits
+
+    #----------------------------------------------------
+    # Internals
+    def _status(self):
+
+        value = 0
+        if self.error_id:
+            value |= qwiic_ccs811._STATUS_ERROR
+        if self._dataReady:
+            value |= qwiic_ccs811._STATUS_DATA_READY
+        if self.app_valid:
+            value |= qwiic_ccs811._STATUS_APP_VALID
+        if self.app_mode:
+            value |= qwiic_ccs811._STATUS_FW_MODE
+        else:
+            now = self.clock.time()
+            if self._eraseDoneAt is not None and now >= self._eraseDoneAt:
+                value |= qwiic_ccs811._STATUS_APP_ERASE
+            if self._verifyDoneAt is not None and now >= self._verifyDoneAt:
+                value |= qwiic_ccs811._STATUS_APP_VERIFY
+        return value
+
+    def _interrupt(self):
+
+        if not self._dataReady or not self.meas_mode & qwiic_ccs811._MEAS_MODE_INT_DATARDY:
+            return False
+
+        # in threshold mode, only a band change asserts nINT
+        if self.meas_mode & qwiic_ccs811._MEAS_MODE_INT_THRESH:
+            return self._bandChanged
+
+        return True
+
+    def _period(self):
+
+        if not self.app_mode or self._modeStart is None:
+            return None
+
+        period = _DRIVE_MODE_PERIODS.get((self.meas_mode >> 4) & 0x07)
+        if period is None:
+            return None
+        return period * (1. + self.clock_error)
+
+    # Produce any results that are due
+    def _update(self):
+
+        period = self._period()
+        if period is None:
+            return
+
+        due = int((self.clock.time() - self._modeStart) / period)
+        if due <= self._results:
+            return
+
+        skipped = due - self._results - 1
+        if self._dataReady:
+            skipped += 1
+        self.missed_results += skipped
+        self._results = due
+
+        if self.air_source is not None:
+            self.co2, self.tvoc = self.air_source(due)
+
+        if self.meas_mode & qwiic_ccs811._MEAS_MODE_DRIVE_MASK != 4 << 4:
+            # RAW mode (4) only updates RAW_DATA
+            self._resultCo2 = self.co2
+            self._resultTvoc = self.tvoc
+
+            lowMed, medHigh, hysteresis = self.thresholds
+            band = qwiic_ccs811.co2_band(self.co2, lowMed, medHigh, hysteresis, self._band)
+            if band != self._band:
+                self._band = band
+                self._bandChanged = True
+
+        self._resultRaw = [((self.raw_current & 0x3F) << 2) | ((self.raw_adc >> 8) & 0x03),
+                           self.raw_adc & 0xFF]
+        self._new_result()
+
+    # Hook for a new result - sets DATA_READY and wakes waiters
+    def _new_result(self):
+
+        self._dataReady = True
+        self._resultEvent.notify_all()
+
+    def _transaction(self, address, register, nRead=0, nWritten=0):
+
+        self.transactions += 1
+        self.bytes_read += nRead
+        self.bytes_written += nWritten + 1  # register address
+
+        if address != self.address:
+            raise IOError("No device at address 0x%.2X" % address)
+
+        if self.clock.time() < self._bootUntil:
+            raise IOError("Device at address 0x%.2X is booting" % address)
+
+        if self._failCount and (self._failRegister is None or self._failRegister == register):
+            if self._failCount > 0:
+                self._failCount -= 1
+            raise IOError("Injected I/O error on register 0x%.2X" % register)
+
+        self._update()
+
+    def _read_register(self, register, nBytes):
+
+        if register == CSS811_STATUS:
+            data = [self._status()]
+
+        elif register == CSS811_HW_ID:
+            data = [self.hw_id]
+
+        elif register == CSS811_HW_VERSION:
+            data = [self.hw_version]
+
+        elif register == CSS811_FW_BOOT_VERSION:
+            data = list(self.fw_boot_version)
+
+        elif register == CSS811_FW_APP_VERSION:
+            data = list(self.fw_app_version)
+
+        elif register == CSS811_ERROR_ID:
+            data = [self.error_id]
+            self.error_id = self._heldErrors  # reading ERROR_ID clears it
+
+        elif not self.app_mode:
+            # the rest only exist in application mode
+            self.error_id |= ERROR_READ_REG_INVALID
+            data = [0] * nBytes
+
+        elif register == CSS811_MEAS_MODE:
+            data = [self.meas_mode]
+
+        elif register == CSS811_ALG_RESULT_DATA:
+            data = [self._resultCo2 >> 8, self._resultCo2 & 0xFF,
+                    self._resultTvoc >> 8, self._resultTvoc & 0xFF,
+                    self._status(), self.error_id] + self._resultRaw
+            self._dataReady = False
+            self._bandChanged = False
+
+        elif register == CSS811_RAW_DATA:
+            data = list(self._resultRaw)
+
+        elif register == CSS811_NTC:
+            data = [self.vref_counts >> 8, self.vref_counts & 0xFF,
+                    self.ntc_counts >> 8, self.ntc_counts & 0xFF]
+
+        elif register == CSS811_BASELINE:
+            data = list(self.baseline)
+
+        else:
+            self.error_id |= ERROR_READ_REG_INVALID
+            data = []
+
+        # registers read past their end return zeros
+        return (data + [0] * nBytes)[:nBytes]
+
+    def _write_register(self, register, data):
+
+        if register == CSS811_SW_RESET:
+            if list(data) == _RESET_KEY:
+                self.power_on()
+            return
+
+        if register == CSS811_APP_START:
+            if not self.app_mode and self.app_valid:
+                self.app_mode = True
+            elif not self.app_mode:
+                self.error_id |= ERROR_MSG_INVALID
+            return
+
+        if not self.app_mode:
+            self._write_boot_register(register, data)
+            return
+
+        if register == CSS811_MEAS_MODE and len(data) == 1:
+            value = data[0]
+            if (value >> 4) & 0x07 > 4:
+                self.error_id |= ERROR_MEASMODE_INVALID
+                return
+            if (value ^ self.meas_mode) & qwiic_ccs811._MEAS_MODE_DRIVE_MASK:
+                # mode change restarts the measurement timing
+                self._modeStart = self.clock.time()
+                self._results = 0
+            self.meas_mode = value
+
+        elif register == CSS811_ENV_DATA and len(data) == 4:
+            self.env_data = list(data)
+
+        elif register == CSS811_BASELINE and len(data) == 2:
+            self.baseline = list(data)
+
+        elif register == CSS811_THRESHOLDS and len(data) == 5:
+            self.thresholds = ((data[0] << 8) | data[1], (data[2] << 8) | data[3], data[4])
+
+        else:
+            self.error_id |= ERROR_MSG_INVALID
+
+    # Boot loader registers
+    def _write_boot_register(self, register, data):
+
+        now = self.clock.time()
+        erased = self._eraseDoneAt is not None and now >= self._eraseDoneAt
+
+        if register == CSS811_APP_ERASE and list(data) == _ERASE_KEY:
+            self.flash = bytearray()
+            self.app_valid = False
+            self._eraseDoneAt = now + self.erase_time
+            self._verifyDoneAt = None
+
+        elif register == CSS811_APP_DATA and len(data) == 8 and erased:
+            self.flash.extend(data)
+
+        elif register == CSS811_APP_VERIFY and not data and erased:
+            if self.image_validator is not None:
+                self.app_valid = bool(self.image_validator(bytes(self.flash)))
+            else:
+                self.app_valid = len(self.flash) > 0
+            self._verifyDoneAt = now + self.verify_time
+
+        else:
+            self.error_id |= ERROR_MSG_INVALID
+
+    #----------------------------------------------------
+    # qwiic_i2c driver interface
+    def isDeviceConnected(self, devAddress):
+        """
+            Return True if devAddress is the address of this device.
+
+            :rtype: bool
+        """
+        return devAddress == self.address
+
+    def readByte(self, address, commandCode):
+        """
+            Read a byte from a register.
+        """
+        with self._lock:
+            self._transaction(address, commandCode, nRead=1)
+            return self._read_register(commandCode, 1)[0]
+
+    def readWord(self, address, commandCode):
+        """
+            Read a word from a register. As with SMBus, the first byte is
+            the low byte of the word.
+        """
+        with self._lock:
+            self._transaction(address, commandCode, nRead=2)
+            data = self._read_register(commandCode, 2)
+            return data[0] | (data[1] << 8)
+
+    def readBlock(self, address, commandCode, nBytes):
+        """
+            Read a block of bytes from a register.
+        """
+        with self._lock:
+            self._transaction(address, commandCode, nRead=nBytes)
+            return self._read_register(commandCode, nBytes)
+
+    def writeCommand(self, address, commandCode):
+        """
+            Write a register address with no data.
+        """
+        with self._lock:
+            self._transaction(address, commandCode)
+            self._write_register(commandCode, [])
+
+    def writeByte(self, address, commandCode, value):
+        """
+            Write a byte to a register.
+        """
+        with self._lock:
+            self._transaction(address, commandCode, nWritten=1)
+            self._write_register(commandCode, [value & 0xFF])
+
+    def writeWord(self, address, commandCode, value):
+        """
+            Write a word to a register. As with SMBus, the low byte is
+            sent first.
+        """
+        with self._lock:
+            self._transaction(address, commandCode, nWritten=2)
+            self._write_register(commandCode, [value & 0xFF, (value >> 8) & 0xFF])
+
+    def writeBlock(self, address, commandCode, value):
+        """
+            Write a block of bytes to a register.
+        """
+        with self._lock:
+            self._transaction(address, commandCode, nWritten=len(value))
+            self._write_register(commandCode, [v & 0xFF for v in value])
+
+    #----------------------------------------------------
+    # nINT edge source
+    def edge_source(self):
+        """
+            Return an nINT edge source for QwiicCcs811.set_interrupt_source().
+
+            :rtype: EmulatorEdgeSource
+        """
+        return EmulatorEdgeSource(self)
+
+
+class EmulatorEdgeSource(object):
+    """
+        nINT edge source driven by a Ccs811Emulator. Waiting uses the emulator
+        clock, so with a VirtualClock the wait advances time instead of sleeping.
+
+        :param emulator: The emulated device
+    """
+    def __init__(self, emulator):
+
+        self._emulator = emulator
+
+    def wait(self, timeout=None):
+        """
+            Wait until nINT is asserted.
+
+            :param timeout: Seconds to wait, None to wait forever
+            :return: True if nINT is asserted
+            :rtype: bool
+        """
+        emulator = self._emulator
+        clock = emulator.clock
+        deadline = None if timeout is None else clock.time() + timeout
+
+        while not emulator.nint:
+
+            due = emulator.next_result_time()
+            now = clock.time()
+            if due is None:
+                # idle - nothing will happen unless the mode changes
+                due = now + 0.1
+            if deadline is not None:
+                if now >= deadline:
+                    return False
+                due = min(due, deadline)
+            clock.sleep(max(due - now, 0.) + 1e-6)
+
+        return True
+
+
+class EmulatedBus(object):
+    """
+        An I2C bus with several emulated devices, dispatching each call on the
+        device address.
+
+        :param devices: The Ccs811Emulator objects on the bus
+    """
+    def __init__(self, devices=()):
+
+        self.devices = dict((device.address, device) for device in devices)
+
+    def add_device(self, device):
+        """
+            Add a device to the bus.
+
+            :return: No return value
+        """
+        self.devices[device.address] = device
+
+    def _device(self, address):
+
+        device = self.devices.get(address)
+        if device is None:
+            raise IOError("No device at address 0x%.2X" % address)
+        return device
+
+    def isDeviceConnected(self, devAddress):
+        """
+            Return True if a device answers on devAddress.
+
+            :rtype: bool
+        """
+        return devAddress in self.devices
+
+    def readByte(self, address, commandCode):
+        """Read a byte from a register of the device at address"""
+        return self._device(address).readByte(address, commandCode)
+
+    def readWord(self, address, commandCode):
+        """Read a word from a register of the device at address"""
+        return self._device(address).readWord(address, commandCode)
+
+    def readBlock(self, address, commandCode, nBytes):
+        """Read a block from a register of the device at address"""
+        return self._device(address).readBlock(address, commandCode, nBytes)
+
+    def writeCommand(self, address, commandCode):
+        """Write a register address to the device at address"""
+        return self._device(address).writeCommand(address, commandCode)
+
+    def writeByte(self, address, commandCode, value):
+        """Write a byte to a register of the device at address"""
+        return self._device(address).writeByte(address, commandCode, value)
+
+    def writeWord(self, address, commandCode, value):
+        """Write a word to a register of the device at address"""
+        return self._device(address).writeWord(address, commandCode, value)
+
+    def writeBlock(self, address, commandCode, value):
+        """Write a block to a register of the device at address"""
+        return self._device(address).writeBlock(address, commandCode, value)
+
+
+#----------------------------------------------------
+# Capture and replay
+#
+# A capture file is an 8 byte magic and a uint32 version, followed by one
+# event per driver call:
+#
+#   op          uint8   driver method, see _CAPTURE_OPS
+#   flags       uint8   _CAPTURE_IOERROR if the call raised IOError
+#   address     uint8   device address
+#   register    uint8   register (0 for isDeviceConnected)
+#   delta       float32 seconds from the start of the previous event
+#   duration    float32 seconds the call took
+#   length      uint16  payload length
+#   payload             bytes read, or bytes written. Words are little endian.
+_CAPTURE_MAGIC = b'CCS811IC'
+_CAPTURE_VERSION = 1
+_CAPTURE_HEADER = struct.Struct('<8sI')
+_CAPTURE_EVENT = struct.Struct('<BBBBffH')
+_CAPTURE_IOERROR = 1
+
+_CAPTURE_OPS = ('isDeviceConnected', 'readByte', 'readWord', 'readBlock',
+                'writeCommand', 'writeByte', 'writeWord', 'writeBlock')
+_CAPTURE_OP_CODES = dict((name, code) for code, name in enumerate(_CAPTURE_OPS))
+
+# Where the payload comes from: the result of reads, the written value of writes
+_CAPTURE_READS = frozenset(('isDeviceConnected', 'readByte', 'readWord', 'readBlock'))
+
+class CaptureEvent(namedtuple('CaptureEvent', ['time', 'op', 'address', 'register', 'error',
+                                               'duration', 'payload'])):
+    """
+        One driver call from a capture file.
+
+        :time: Seconds from the start of the capture
+        :op: Name of the driver method
+        :address: Device address
+        :register: Register, 0 for isDeviceConnected
+        :error: True if the call raised IOError
+        :duration: Seconds the call took
+        :payload: Bytes read or written, as a bytearray
+    """
+    __slots__ = ()
+
+class ReplayMismatchError(ValueError):
+    """
+        Raised by ReplayDriver when a call doesn't match the capture.
+    """
+    pass
+
+def _encode_payload(op, value):
+
+    if value is None:
+        return b''
+    if op in ('readByte', 'writeByte', 'isDeviceConnected'):
+        return struct.pack('<B', int(value) & 0xFF)
+    if op in ('readWord', 'writeWord'):
+        return struct.pack('<H', value & 0xFFFF)
+    return bytes(bytearray(value))
+
+def _decode_payload(op, payload):
+
+    if op == 'isDeviceConnected':
+        return bool(payload[0])
+    if op == 'readByte':
+        return payload[0]
+    if op == 'readWord':
+        return payload[0] | payload[1] << 8
+    if op == 'readBlock':
+        return list(payload)
+    return None
+
+# Yields (fields, payload) for each event of an open capture file, reading
+# the file as it goes. Stops at a partly written event.
+def _read_capture_records(fCapture, path):
+
+    header = fCapture.read(_CAPTURE_HEADER.size)
+    if len(header) < _CAPTURE_HEADER.size:
+        raise ValueError("%s is not a CCS811 capture" % path)
+
+    magic, version = _CAPTURE_HEADER.unpack(header)
+    if magic != _CAPTURE_MAGIC or version != _CAPTURE_VERSION:
+        raise ValueError("%s is not a CCS811 capture" % path)
+
+    while True:
+        record = fCapture.read(_CAPTURE_EVENT.size)
+        if len(record) < _CAPTURE_EVENT.size:
+            break
+        fields = _CAPTURE_EVENT.unpack(record)
+        payload = fCapture.read(fields[-1])
+        if len(payload) < fields[-1]:
+            # cut short, the capture wasn't closed
+            break
+        yield fields, payload
+
+def read_capture(path):
+    """
+        Generator that yields the events of a capture file. The file is read
+        as events are taken, so captures of any length can be replayed in
+        constant memory.
+
+        :param path: The capture file
+        :return: Yields CaptureEvent objects
+        :rtype: CaptureEvent
+    """
+    with open(path, 'rb') as fCapture:
+        now = 0.
+        for fields, payload in _read_capture_records(fCapture, path):
+            code, flags, address, register, delta, duration, _ = fields
+            now += delta
+            yield CaptureEvent(now, _CAPTURE_OPS[code], address, register, flags & _CAPTURE_IOERROR != 0,
+                               duration, bytearray(payload))
+
+def _count_capture(path):
+
+    with open(path, 'rb') as fCapture:
+        return sum(1 for _ in _read_capture_records(fCapture, path))
+
+class CaptureDriver(qwiic_ccs811._DriverWrapper):
+    """
+    CaptureDriver
+
+        Wraps an i2c driver and records every call - register, payload, result
+        and timing - to a capture file, for ReplayDriver.
+
+            sensor = qwiic_ccs811.QwiicCcs811(i2c_driver=CaptureDriver(driver, 'trace.cap'))
+
+        :param driver: The i2c driver to record
+        :param path: The capture file. It's overwritten.
+        :return: The CaptureDriver object.
+        :rtype: Object
+    """
+    def __init__(self, driver, path):
+
+        qwiic_ccs811._DriverWrapper.__init__(self, driver)
+        self.path = path
+        self.events = 0
+
+        self._file = open(path, 'wb')
+        self._file.write(_CAPTURE_HEADER.pack(_CAPTURE_MAGIC, _CAPTURE_VERSION))
+        self._last = None
+        self._lock = threading.Lock()
+
+    def _record(self, name, address, register, start, duration, error, payload):
+
+        with self._lock:
+            delta = 0. if self._last is None else start - self._last
+            self._last = start
+            self._file.write(_CAPTURE_EVENT.pack(_CAPTURE_OP_CODES[name], _CAPTURE_IOERROR if error else 0,
+                                                 address, register, delta, duration, len(payload)))
+            self._file.write(payload)
+            self.events += 1
+
+    def _call(self, func, register, nRead, nWritten, args):
+
+        name = func.__name__
+        start = qwiic_ccs811._monotonic()
+        try:
+            result = func(*args)
+        except IOError:
+            payload = b'' if name in _CAPTURE_READS else _encode_payload(name, args[2] if len(args) > 2 else None)
+            self._record(name, args[0], register, start, qwiic_ccs811._monotonic() - start, True, payload)
+            raise
+
+        duration = qwiic_ccs811._monotonic() - start
+        if name in _CAPTURE_READS:
+            payload = _encode_payload(name, result)
+        else:
+            payload = _encode_payload(name, args[2] if len(args) > 2 else None)
+        self._record(name, args[0], register, start, duration, False, payload)
+        return result
+
+    def isDeviceConnected(self, devAddress):
+        return self._call(self.driver.isDeviceConnected, 0, 0, 0, (devAddress,))
+
+    def flush(self):
+        """
+            Write buffered events to the file.
+
+            :return: No return value
+        """
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        """
+            Close the capture file.
+
+            :return: No return value
+        """
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+class ReplayDriver(object):
+    """
+    ReplayDriver
+
+        An i2c driver that answers from a capture file. Each call must match the
+        next captured call - same method, address, register and, for writes, the
+        same value - or ReplayMismatchError is raised. Captured I/O errors are
+        raised again as IOError.
+
+        Only the driver is paced by realtime; waits made by QwiicCcs811 itself,
+        such as in begin() or iter_samples(), still happen.
+
+        :param path: The capture file
+        :param realtime: If True, calls wait to keep the captured pace. If False,
+                        replay runs as fast as the caller makes calls.
+        :param strict: If False, written values aren't checked.
+        :return: The ReplayDriver object.
+        :rtype: Object
+    """
+    def __init__(self, path, realtime=False, strict=True):
+
+        self.path = path
+        self.realtime = realtime
+        self.strict = strict
+
+        self._events = None
+        self._event = None      # the next event, once read
+        self._count = None      # counted when remaining is first asked for
+        self.rewind()
+
+    def rewind(self):
+        """
+            Start the replay again from the first event.
+
+            :return: No return value
+        """
+        self.close()
+        # events are read from the file as they are replayed
+        self._events = read_capture(self.path)
+        self._event = None
+        self._index = 0
+        self._start = None
+
+    def close(self):
+        """
+            Close the capture file.
+
+            :return: No return value
+        """
+        if self._events is not None:
+            self._events.close()
+            self._events = None
+
+    def get_remaining(self):
+        """
+            Return the number of events not yet replayed. The first call reads
+            through the capture file to count its events.
+
+            :rtype: integer
+        """
+        if self._count is None:
+            self._count = _count_capture(self.path)
+        return self._count - self._index
+
+    remaining = property(get_remaining)
+
+    def _replay(self, name, address, register, value=None, nBytes=None):
+
+        event = self._event
+        if event is None and self._events is not None:
+            event = self._event = next(self._events, None)
+        if event is None:
+            raise ReplayMismatchError("Capture ended before %s(0x%.2X, 0x%.2X)" % (name, address, register))
+
+        if event.op != name or event.address != address or event.register != register:
+            raise ReplayMismatchError("Event %d: expected %s(0x%.2X, 0x%.2X), got %s(0x%.2X, 0x%.2X)" %
+                                      (self._index, event.op, event.address, event.register,
+                                       name, address, register))
+
+        if self.strict and name not in _CAPTURE_READS and not event.error and \
+                bytearray(_encode_payload(name, value)) != event.payload:
+            raise ReplayMismatchError("Event %d: %s(0x%.2X, 0x%.2X) wrote a different value" %
+                                      (self._index, name, address, register))
+
+        if nBytes is not None and not event.error and nBytes != len(event.payload):
+            raise ReplayMismatchError("Event %d: %s(0x%.2X, 0x%.2X) read %d bytes, the capture has %d" %
+                                      (self._index, name, address, register, nBytes, len(event.payload)))
+
+        self._index += 1
+        self._event = None
+
+        if self.realtime:
+            now = qwiic_ccs811._monotonic()
+            if self._start is None:
+                self._start = now - event.time
+            delay = self._start + event.time + event.duration - now
+            if delay > 0:
+                time.sleep(delay)
+
+        if event.error:
+            raise IOError("Replayed I/O error on %s(0x%.2X, 0x%.2X)" % (name, address, register))
+
+        return _decode_payload(name, event.payload)
+
+    def isDeviceConnected(self, devAddress):
+        """Replay an isDeviceConnected call"""
+        return self._replay('isDeviceConnected', devAddress, 0)
+
+    def readByte(self, address, commandCode):
+        """Replay a readByte call"""
+        return self._replay('readByte', address, commandCode)
+
+    def readWord(self, address, commandCode):
+        """Replay a readWord call"""
+        return self._replay('readWord', address, commandCode)
+
+    def readBlock(self, address, commandCode, nBytes):
+        """Replay a readBlock call"""
+        return self._replay('readBlock', address, commandCode, nBytes=nBytes)
+
+    def writeCommand(self, address, commandCode):
+        """Replay a writeCommand call"""
+        return self._replay('writeCommand', address, commandCode)
+
+    def writeByte(self, address, commandCode, value):
+        """Replay a writeByte call"""
+        return self._replay('writeByte', address, commandCode, value)
+
+    def writeWord(self, address, commandCode, value):
+        """Replay a writeWord call"""
+        return self._replay('writeWord', address, commandCode, value)
+
+    def writeBlock(self, address, commandCode, value):
+        """Replay a writeBlock call"""
+        return self._replay('writeBlock', address, commandCode, value)
@@ -37,9 +37,20 @@
 from setuptools import setup, find_packages  # Always prefer setuptools over distutils
 from os import path
 import io
+import sys
 
 here = path.abspath(path.dirname(__file__))
 
+modules = ["qwiic_ccs811", "qwiic_ccs811_sim", "qwiic_ccs811_data", "qwiic_ccs811_exporter"]
+options = {}
+
+# The asyncio support needs Python 3.7 or later, so it's only installed there.
+# A wheel that includes it is tagged py37, which pip takes for 3.7 and later
+# only; wheels for older versions are built there, without it.
+if sys.version_info >= (3, 7):
+    modules.append("qwiic_ccs811_async")
+    options['bdist_wheel'] = {'python_tag': 'py37'}
+
 # get the log description
 with io.open(path.join(here, "DESCRIPTION.rst"), encoding="utf-8") as f:
     long_description = f.read()
@@ -96,6 +107,10 @@ setup(
 
     # You can just specify the packages manually here if your project is
     # simple. Or you can use find_packages().
-    py_modules=["qwiic_ccs811"],
+    py_modules=modules,
+
+    python_requires='>=2.7, !=3.0.*, !=3.1.*, !=3.2.*, !=3.3.*, !=3.4.*',
+
+    options=options,
 
 )